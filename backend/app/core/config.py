@@ -14,8 +14,19 @@ class Settings(BaseSettings):
     storage_base_path: str = Field(default=str(Path.cwd() / "videos"))
     allowed_origins: list[str] | None = None
     secret_key: str | None = None
+    redis_url: str | None = None
     hf_model_repo: str = Field(default="damo-vilab/text-to-video-ms-1.7b")
     hf_timeout_seconds: int = Field(default=180)
+    max_inflight_gen: int = Field(default=2)
+    max_inflight_downloads: int = Field(default=2)
+    # Reuse UNet deep features for this many steps when DeepCache is installed (0/1 disables).
+    deepcache_interval: int = Field(default=3)
+    # Capture and replay the UNet as CUDA graphs per input shape (local models on CUDA).
+    cuda_graphs: bool = Field(default=False)
+    # Weight-only UNet quantization for local models on CUDA via torchao: "", "int8" or "fp8".
+    unet_quantization: str = Field(default="")
+    # torch.compile the UNet and VAE decoder (mode="reduce-overhead") for local models on CUDA.
+    torch_compile: bool = Field(default=False)
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,24 @@
-from fastapi import Request, HTTPException, Header
+from fastapi import Header
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from collections import OrderedDict, deque
+import asyncio
+import threading
 import time
+import uuid
 import logging
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+_DEV_ORIGINS = ("*",)
+_PROD_DEFAULT = ("http://localhost:3000",)
+
 
 def setup_security_middleware(app, settings):
-    allow_origins = ["*"] if settings.environment != "production" else (settings.allowed_origins or ["http://localhost:3000"])
+    if settings.environment != "production":
+        allow_origins = list(_DEV_ORIGINS)
+    else:
+        allow_origins = list(settings.allowed_origins or _PROD_DEFAULT)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=allow_origins,
@@ -18,41 +27,196 @@ def setup_security_middleware(app, settings):
         allow_headers=["*"]
     )
     app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RateLimitMiddleware, requests_per_minute=100)
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=100, redis_url=settings.redis_url)
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware that appends static security headers.
+
+    Headers are injected into the ``http.response.start`` message so the
+    response body is streamed through untouched.
+    """
+
+    _headers = (
+        (b"x-frame-options", b"DENY"),
+        (b"x-content-type-options", b"nosniff"),
+        (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    )
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).extend(self._headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Atomic sliding window: trim expired entries, count, and record the hit.
+# KEYS[1]=key, ARGV=[cutoff_ms, now_ms, limit, member, window_s]
+_REDIS_SLIDING_WINDOW = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1])
+local n = redis.call('ZCARD', KEYS[1])
+if n >= tonumber(ARGV[3]) then return 1 end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 0
+"""
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        return response
+class RateLimitMiddleware:
+    """Pure ASGI sliding-window rate limiter keyed by client IP.
 
+    When ``redis_url`` is configured the window lives in a Redis sorted set so
+    all workers share one quota; otherwise (or while Redis is unreachable)
+    each client keeps an in-process deque of monotonic timestamps. Local state
+    is split across lock-protected shards so unrelated clients never contend;
+    each shard is an LRU capped at ``max_clients / shards`` entries, and a
+    sweeper started on lifespan startup drops idle clients.
+    """
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+    _body = b'{"detail":"Rate limit exceeded"}'
+    _reject_headers = (
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(_body)).encode("latin-1")),
+    )
+    _shards = 32  # must be a power of two
+    _sweep_interval = 60.0
+    _redis_retry_after = 5.0
+
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        redis_url: Optional[str] = None,
+        max_clients: int = 10000,
+    ):
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.window = 60
-        self.clients = {}
-        import threading
-        self._lock = threading.Lock()
-
-    async def dispatch(self, request: Request, call_next):
-        ip = request.client.host if request.client else "unknown"
-        now = time.time()
+        self.window = 60.0
+        self._shard_capacity = max(1, max_clients // self._shards)
+        self._locks = [threading.Lock() for _ in range(self._shards)]
+        self._maps: list[OrderedDict[str, deque[float]]] = [OrderedDict() for _ in range(self._shards)]
+        self.evictions = 0
+        self._sweeper: asyncio.Task | None = None
+        self._redis = None
+        self._redis_script = None
+        self._redis_down_until = 0.0
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(redis_url)
+                self._redis_script = self._redis.register_script(_REDIS_SLIDING_WINDOW)
+            except Exception as e:
+                logger.warning(f"Redis rate limiting unavailable, using in-process limiter: {e}")
+                self._redis = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._lifespan_receive(receive), send)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        limited = await self._redis_hit(ip)
+        if limited is None:
+            limited = self._local_hit(ip)
+
+        if limited:
+            await self._reject(send)
+            return
+        await self.app(scope, receive, send)
+
+    async def _redis_hit(self, ip: str) -> Optional[bool]:
+        """Record a hit in Redis; returns None when Redis cannot be used."""
+        if self._redis_script is None or time.monotonic() < self._redis_down_until:
+            return None
+        now_ms = int(time.time() * 1000)
+        cutoff_ms = now_ms - int(self.window * 1000)
+        try:
+            result = await self._redis_script(
+                keys=[f"rl:{ip}"],
+                args=[cutoff_ms, now_ms, self.requests_per_minute, uuid.uuid4().hex, int(self.window)],
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limit check failed, falling back to in-process limiter: {e}")
+            self._redis_down_until = time.monotonic() + self._redis_retry_after
+            return None
+        return bool(int(result))
+
+    def _local_hit(self, ip: str) -> bool:
+        now = time.monotonic()
         window_start = now - self.window
-        
-        with self._lock:
-            timestamps = self.clients.get(ip, [])
-            timestamps = [t for t in timestamps if t >= window_start]
+        idx = hash(ip) & (self._shards - 1)
+
+        with self._locks[idx]:
+            clients = self._maps[idx]
+            timestamps = clients.get(ip)
+            if timestamps is None:
+                timestamps = clients[ip] = deque()
+                if len(clients) > self._shard_capacity:
+                    clients.popitem(last=False)
+                    self.evictions += 1
+            else:
+                clients.move_to_end(ip)
+            while timestamps and timestamps[0] < window_start:
+                timestamps.popleft()
             if len(timestamps) >= self.requests_per_minute:
-                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+                return True
             timestamps.append(now)
-            self.clients[ip] = timestamps
-        
-        return await call_next(request)
+            return False
+
+    def _lifespan_receive(self, receive):
+        async def wrapped():
+            message = await receive()
+            if message["type"] == "lifespan.startup" and self._sweeper is None:
+                self._sweeper = asyncio.create_task(self._sweep_loop())
+            elif message["type"] == "lifespan.shutdown":
+                if self._sweeper is not None:
+                    self._sweeper.cancel()
+                    self._sweeper = None
+                if self._redis is not None:
+                    try:
+                        await self._redis.aclose()
+                    except Exception:
+                        pass
+            return message
+        return wrapped
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Drop clients with no timestamps inside the current window."""
+        window_start = time.monotonic() - self.window
+        removed = 0
+        for lock, clients in zip(self._locks, self._maps):
+            with lock:
+                stale = [ip for ip, ts in clients.items() if not ts or ts[-1] < window_start]
+                for ip in stale:
+                    del clients[ip]
+                removed += len(stale)
+        return removed
+
+    async def _reject(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": list(self._reject_headers),
+        })
+        await send({"type": "http.response.body", "body": self._body})
 
 
 async def api_key_dependency(authorization: Optional[str] = Header(default=None)):
@@ -1,33 +1,92 @@
+import asyncio
 import time
 import json
 import os
+from contextlib import asynccontextmanager
+import httpx
+import orjson
 from pathlib import Path
 from typing import Optional, List
-from fastapi import FastAPI, Depends, HTTPException, Request, Body, Query
+from fastapi import FastAPI, Depends, HTTPException, Request, Body, Query, Response
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.staticfiles import StaticFiles
 
 from .core.config import settings, initialize_application
 from .core.security import setup_security_middleware, api_key_dependency
 from .utils.hardware import get_hardware_info, estimate_performance
 
 from .services.storage import get_video_storage
-from .services.generator import get_video_generator
-from .services.models import get_local_model_registry
+from .services.generator import get_video_generator, GeneratorBusyError
+from .services.models import get_local_model_registry, DownloadBusyError
 
 # Initialize
 initialize_application()
 
+_HF_WHOAMI_URL = "https://huggingface.co/api/whoami-v2"
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class; orjson encodes straight to bytes.
+
+    Defined locally because fastapi.responses.ORJSONResponse is deprecated in
+    newer FastAPI releases.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _log_route_table(app: FastAPI) -> None:
+    """Log the route count and flag any path/method registered twice."""
+    import logging
+    logger = logging.getLogger(__name__)
+    seen: set[tuple[str, str]] = set()
+    for route in app.routes:
+        for method in sorted(getattr(route, "methods", None) or {"*"}):
+            key = (getattr(route, "path", ""), method)
+            if key in seen:
+                logger.warning("Duplicate route registered: %s %s", method, key[0])
+            seen.add(key)
+    logger.info("Registered %d routes", len(app.routes))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared client so outbound calls to huggingface.co reuse pooled connections.
+    app.state.http = httpx.AsyncClient(timeout=15)
+    _log_route_table(app)
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        # Persist any debounced metadata updates before the worker exits.
+        storage.flush()
+
+
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     debug=settings.debug,
     docs_url="/docs",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 setup_security_middleware(app, settings)
 
 
+# Pre-encoded bodies for the hot not-found paths; returning a Response skips
+# building and unwinding an HTTPException per miss.
+_JOB_NOT_FOUND = orjson.dumps({"detail": "Job not found"})
+_VIDEO_NOT_FOUND = orjson.dumps({"detail": "Video not found"})
+_NOT_FOUND = orjson.dumps({"detail": "Not Found"})
+
+
+def _json_error(body: bytes, status_code: int = 404) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
 class HealthResponse(BaseModel):
     status: str
     message: str
@@ -36,15 +95,20 @@ class HealthResponse(BaseModel):
     timestamp: float
 
 
-@app.get("/health", response_model=HealthResponse)
+# Everything but the timestamp is static, so the JSON prefix is built once.
+_HEALTH_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "message": f"{settings.app_name} is running",
+    "version": settings.app_version,
+    "environment": settings.environment,
+})[:-1] + b',"timestamp":'
+
+
+# HealthResponse only documents the schema; the body is pre-serialized, so no
+# response_model validation runs on this (frequently probed) route.
+@app.get("/health", responses={200: {"model": HealthResponse}})
 async def health():
-    return HealthResponse(
-        status="healthy",
-        message=f"{settings.app_name} is running",
-        version=settings.app_version,
-        environment=settings.environment,
-        timestamp=time.time(),
-    )
+    return Response(content=_HEALTH_PREFIX + orjson.dumps(time.time()) + b"}", media_type="application/json")
 
 
 @app.get("/hardware")
@@ -82,27 +146,57 @@ storage = get_video_storage()
 generator = get_video_generator(storage)
 model_registry = get_local_model_registry()
 
+# Finished files are served straight from disk (Range requests included);
+# the /videos/{id}/... routes below only build missing artifacts, then redirect.
+class VideoArtifactFiles(StaticFiles):
+    """StaticFiles limited to ``{video_id}/output.mp4`` and ``{video_id}/thumbnail.jpg``.
+
+    Everything else under the storage root (metadata.json, raw frames) stays
+    private. Downloads keep the ``video_{id}.mp4`` / ``thumbnail_{id}.jpg``
+    filenames the old FileResponse routes sent.
+    """
+
+    _artifacts = {"output.mp4": "video_{}.mp4", "thumbnail.jpg": "thumbnail_{}.jpg"}
+
+    async def get_response(self, path: str, scope):
+        parts = path.replace("\\", "/").split("/")
+        if len(parts) != 2 or parts[0] in ("", ".", "..") or parts[1] not in self._artifacts:
+            return _json_error(_NOT_FOUND)
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 206):
+            filename = self._artifacts[parts[1]].format(parts[0])
+            response.headers["content-disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+app.mount("/videos-static", VideoArtifactFiles(directory=storage.storage_base_path), name="videos-static")
+
 
 @app.post("/generate")
 async def generate(req: GenerateRequest = Body(...)):
     if req.use_hf_api and not req.hf_token:
         raise HTTPException(status_code=400, detail="Hugging Face token required for cloud generation")
-    result = generator.generate_video(
-        prompt=req.prompt,
-        num_frames=req.num_frames,
-        fps=req.fps,
-        width=req.width,
-        height=req.height,
-        use_hf_api=req.use_hf_api,
-        hf_token=req.hf_token,
-        hf_model_repo=req.hf_model_repo,
-        # local_model_key indicates a specific local preset (e.g. zeroscope-local).
-        local_model_key=req.local_model_key,
-        negative_prompt=req.negative_prompt,
-        num_inference_steps=req.num_inference_steps,
-        guidance_scale=req.guidance_scale,
-        seed=req.seed,
-    )
+    try:
+        # generate_video persists the job record to disk; keep that off the loop.
+        result = await asyncio.to_thread(
+            generator.generate_video,
+            prompt=req.prompt,
+            num_frames=req.num_frames,
+            fps=req.fps,
+            width=req.width,
+            height=req.height,
+            use_hf_api=req.use_hf_api,
+            hf_token=req.hf_token,
+            hf_model_repo=req.hf_model_repo,
+            # local_model_key indicates a specific local preset (e.g. zeroscope-local).
+            local_model_key=req.local_model_key,
+            negative_prompt=req.negative_prompt,
+            num_inference_steps=req.num_inference_steps,
+            guidance_scale=req.guidance_scale,
+            seed=req.seed,
+        )
+    except GeneratorBusyError:
+        raise HTTPException(status_code=503, detail="Server busy: too many generations in progress")
     if result is None:
         raise HTTPException(status_code=500, detail="Failed to start generation")
     return result
@@ -110,166 +204,223 @@ async def generate(req: GenerateRequest = Body(...)):
 
 @app.get("/status/{job_id}")
 async def get_status(job_id: str):
-    with generator._status_lock:
-        status = generator.generation_status.get(job_id)
+    status = generator.get_generation_status(job_id)
     if not status:
-        raise HTTPException(status_code=404, detail="Job not found")
+        return _json_error(_JOB_NOT_FOUND)
     return status
 
 
-@app.get("/videos")
-async def list_videos():
-    """List only videos that actually have a folder and either frames or an output.mp4 file.
+# video_id -> directory mtime (ns) at which the folder was seen to contain
+# output.mp4 or frames. Only positive results are cached so a folder that is
+# still being written is always rescanned.
+_video_files_cache: dict[str, int] = {}
 
-    This avoids returning stale metadata entries for jobs that never produced files,
-    which would cause 404s when the frontend requests /videos/{id}/output.mp4.
-    """
+
+_FRAME_PREFIX = "frame_"
+_FRAME_SUFFIX = ".png"
+
+
+def _frame_files(video_dir: Path) -> list[str]:
+    """Sorted frame_*.png paths in a video folder via a single readdir."""
+    try:
+        with os.scandir(video_dir) as it:
+            return sorted(e.path for e in it if e.name.startswith(_FRAME_PREFIX) and e.name.endswith(_FRAME_SUFFIX))
+    except OSError:
+        return []
+
+
+def _has_video_files(video_dir: str) -> bool:
+    try:
+        with os.scandir(video_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name == "output.mp4" or (name.startswith(_FRAME_PREFIX) and name.endswith(_FRAME_SUFFIX)):
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+def _existing_videos() -> list[dict]:
     videos = storage.list_videos()
     existing: list[dict] = []
-    base = Path(storage.storage_base_path)
+    base = storage.storage_base_path
     for v in videos:
         vid = v.get("id") if isinstance(v, dict) else None
         if not vid:
             continue
-        video_dir = base / str(vid)
-        if not video_dir.exists():
+        video_dir = os.path.join(base, str(vid))
+        try:
+            mtime = os.stat(video_dir).st_mtime_ns
+        except OSError:
+            _video_files_cache.pop(vid, None)
             continue
-        output = video_dir / "output.mp4"
-        has_output = output.exists()
-        has_frames = any(video_dir.glob("frame_*.png"))
-        if has_output or has_frames:
-            existing.append(v)
+        if _video_files_cache.get(vid) != mtime:
+            if not _has_video_files(video_dir):
+                continue
+            _video_files_cache[vid] = mtime
+        existing.append(v)
     return existing
 
 
+@app.get("/videos")
+async def list_videos():
+    """List only videos that actually have a folder and either frames or an output.mp4 file.
+
+    This avoids returning stale metadata entries for jobs that never produced files,
+    which would cause 404s when the frontend requests /videos/{id}/output.mp4.
+    Each folder costs a single stat once it is known to contain files; the
+    per-folder stats run off the event loop.
+    """
+    return await asyncio.to_thread(_existing_videos)
+
+
 @app.get("/videos/{video_id}")
 async def get_video_metadata(video_id: str):
     video = storage.get_video(video_id)
     if video is None:
-        raise HTTPException(status_code=404, detail="Video not found")
+        return _json_error(_VIDEO_NOT_FOUND)
     return video
 
 
 @app.delete("/videos/{video_id}")
 async def delete_video(video_id: str):
-    if not storage.delete_video(video_id):
+    # rmtree plus an fsync'd metadata write; keep both off the event loop.
+    if not await asyncio.to_thread(storage.delete_video, video_id):
         raise HTTPException(status_code=404, detail="Video not found or already deleted")
+    _video_files_cache.pop(video_id, None)
     return {"ok": True, "id": video_id}
 
 
 @app.get("/videos/{video_id}/output.mp4")
 async def serve_video_file(video_id: str):
-    video = storage.get_video(video_id)
-    if video is None:
-        raise HTTPException(status_code=404, detail="Video not found")
     video_dir = Path(storage.storage_base_path) / video_id
     output = video_dir / "output.mp4"
     if not output.exists():
-        # attempt create from frames
-        frame_files = sorted(video_dir.glob("frame_*.png"))
+        video = storage.get_video(video_id)
+        if video is None:
+            return _json_error(_VIDEO_NOT_FOUND)
+        # attempt create from frames, streaming them from disk off the event loop
+        frame_files = _frame_files(video_dir)
         if not frame_files:
             raise HTTPException(status_code=404, detail="No frames found for this video")
-        frames = []
-        from PIL import Image
-        for f in frame_files:
-            try:
-                frames.append(Image.open(f))
-            except Exception:
-                continue
+        # Muxed generations keep only frame_0000.png; don't pass that off as the video.
+        frame_count = int(video.get('frame_count') or 0)
+        if not frame_count or len(frame_files) < frame_count:
+            raise HTTPException(status_code=404, detail="Video file unavailable")
         params = video.get('params') or {}
         fps = params.get('fps', 8)
-        if not storage._create_video_file(video_dir, frames, fps):
+        if not await asyncio.to_thread(storage._create_video_file, video_dir, frame_files, fps):
             raise HTTPException(status_code=500, detail="Failed to create video file")
-    if not output.exists():
-        raise HTTPException(status_code=404, detail="Video file unavailable")
-    return FileResponse(path=str(output), media_type="video/mp4", filename=f"video_{video_id}.mp4")
+        if not output.exists():
+            raise HTTPException(status_code=404, detail="Video file unavailable")
+    return RedirectResponse(f"/videos-static/{video_id}/output.mp4", status_code=307)
+
+
+def _ensure_thumbnail(video_dir: Path, thumb: Path) -> None:
+    try:
+        if storage._create_thumbnail(video_dir):
+            return
+    except Exception:
+        pass
+    from PIL import Image
+    Image.new('RGB', (300, 200), color='gray').save(thumb, "JPEG", quality=85)
 
 
 @app.get("/videos/{video_id}/thumbnail.jpg")
 async def serve_thumbnail(video_id: str):
-    video = storage.get_video(video_id)
-    if video is None:
-        raise HTTPException(status_code=404, detail="Video not found")
     video_dir = Path(storage.storage_base_path) / video_id
     thumb = video_dir / "thumbnail.jpg"
     if not thumb.exists():
-        try:
-            if not storage._create_thumbnail(video_dir):
-                from PIL import Image
-                Image.new('RGB', (300, 200), color='gray').save(thumb, "JPEG", quality=85)
-        except Exception:
-            from PIL import Image
-            Image.new('RGB', (300, 200), color='gray').save(thumb, "JPEG", quality=85)
-    if not thumb.exists():
-        raise HTTPException(status_code=404, detail="Thumbnail unavailable")
-    return FileResponse(path=str(thumb), media_type="image/jpeg", filename=f"thumbnail_{video_id}.jpg")
+        if storage.get_video(video_id) is None:
+            return _json_error(_VIDEO_NOT_FOUND)
+        await asyncio.to_thread(_ensure_thumbnail, video_dir, thumb)
+        if not thumb.exists():
+            raise HTTPException(status_code=404, detail="Thumbnail unavailable")
+    return RedirectResponse(f"/videos-static/{video_id}/thumbnail.jpg", status_code=307)
+
+
+# Curated list including user-provided popular repos; serialized once at import.
+_SUPPORTED_MODELS_JSON = orjson.dumps({
+    "models": [
+        "meituan-longcat/LongCat-Video",
+        "krea/krea-realtime-video",
+        "QuantStack/Wan2.2-T2V-A14B-GGUF",
+        "Wan-AI/Wan2.2-TI2V-5B",
+        "hpcai-tech/Open-Sora-v2",
+        "Wan-AI/Wan2.2-T2V-A14B",
+        "lightx2v/Wan2.2-Lightning",
+        "alibaba-pai/Wan2.2-Fun-Reward-LoRAs",
+        "BAAI/URSA-1.7B-FSQ320",
+        "tencent/HunyuanVideo",
+        "Wan-AI/Wan2.1-T2V-14B",
+        "genmo/mochi-1-preview",
+        "Wan-AI/Wan2.1-T2V-1.3B-Diffusers",
+        "Skywork/SkyReels-V2-DF-14B-720P",
+        "vrgamedevgirl84/Wan14BT2VFusioniX",
+        "Wan-AI/Wan2.2-T2V-A14B-Diffusers",
+        "Wan-AI/Wan2.1-T2V-1.3B",
+        "calcuis/wan-gguf",
+        "QuantStack/Wan2.1_14B_VACE-GGUF",
+        "Wan-AI/Wan2.2-TI2V-5B-Diffusers",
+        "QuantStack/Wan2.2-TI2V-5B-GGUF",
+        "bullerwins/Wan2.2-T2V-A14B-GGUF",
+        "Cseti/wan2.2-14B-Kinestasis_concept-lora-v1",
+        "akhaliq/sora-2",
+        "akhaliq/veo3.1-fast",
+        "TencentARC/RollingForcing",
+        "QuantStack/HoloCine-GGUF",
+        "ali-vilab/modelscope-damo-text-to-video-synthesis",
+        "ali-vilab/i2vgen-xl",
+        "damo-vilab/text-to-video-ms-1.7b",
+    ]
+})
 
 
 @app.get("/models/supported")
 async def supported_models():
-    # Curated list including user-provided popular repos
-    return {
-        "models": [
-            "meituan-longcat/LongCat-Video",
-            "krea/krea-realtime-video",
-            "QuantStack/Wan2.2-T2V-A14B-GGUF",
-            "Wan-AI/Wan2.2-TI2V-5B",
-            "hpcai-tech/Open-Sora-v2",
-            "Wan-AI/Wan2.2-T2V-A14B",
-            "lightx2v/Wan2.2-Lightning",
-            "alibaba-pai/Wan2.2-Fun-Reward-LoRAs",
-            "BAAI/URSA-1.7B-FSQ320",
-            "tencent/HunyuanVideo",
-            "Wan-AI/Wan2.1-T2V-14B",
-            "genmo/mochi-1-preview",
-            "Wan-AI/Wan2.1-T2V-1.3B-Diffusers",
-            "Skywork/SkyReels-V2-DF-14B-720P",
-            "vrgamedevgirl84/Wan14BT2VFusioniX",
-            "Wan-AI/Wan2.2-T2V-A14B-Diffusers",
-            "Wan-AI/Wan2.1-T2V-1.3B",
-            "calcuis/wan-gguf",
-            "QuantStack/Wan2.1_14B_VACE-GGUF",
-            "Wan-AI/Wan2.2-TI2V-5B-Diffusers",
-            "QuantStack/Wan2.2-TI2V-5B-GGUF",
-            "bullerwins/Wan2.2-T2V-A14B-GGUF",
-            "Cseti/wan2.2-14B-Kinestasis_concept-lora-v1",
-            "akhaliq/sora-2",
-            "akhaliq/veo3.1-fast",
-            "TencentARC/RollingForcing",
-            "QuantStack/HoloCine-GGUF",
-            "ali-vilab/modelscope-damo-text-to-video-synthesis",
-            "ali-vilab/i2vgen-xl",
-            "damo-vilab/text-to-video-ms-1.7b",
-        ]
-    }
+    return Response(content=_SUPPORTED_MODELS_JSON, media_type="application/json")
+
+
+_TRENDING_TTL_SECONDS = 60.0
+_trending_cache: dict = {"ts": 0.0, "data": None}
+_trending_lock = asyncio.Lock()
 
 
 @app.get("/models/trending")
-async def trending_models():
-    # Simple proxy to HF public API for text-to-video trending by downloads
+async def trending_models(request: Request):
+    # Simple proxy to HF public API for text-to-video trending by downloads,
+    # cached briefly so concurrent callers share one upstream request.
+    if _trending_cache["data"] is not None and time.monotonic() - _trending_cache["ts"] < _TRENDING_TTL_SECONDS:
+        return _trending_cache["data"]
     try:
-        import httpx
-        params = {
-            "pipeline_tag": "text-to-video",
-            "sort": "downloads",
-            "direction": "-1",
-            "limit": 30,
-        }
-        r = httpx.get("https://huggingface.co/api/models", params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        # Return compact fields
-        models = [
-            {
-                "id": m.get("id"),
-                "likes": m.get("likes"),
-                "downloads": m.get("downloads") or m.get("downloadsAllTime"),
-                "tags": m.get("tags"),
-                "updatedAt": m.get("lastModified"),
+        async with _trending_lock:
+            if _trending_cache["data"] is not None and time.monotonic() - _trending_cache["ts"] < _TRENDING_TTL_SECONDS:
+                return _trending_cache["data"]
+            params = {
+                "pipeline_tag": "text-to-video",
+                "sort": "downloads",
+                "direction": "-1",
+                "limit": 30,
             }
-            for m in data
-        ]
-        return {"models": models}
+            r = await request.app.state.http.get("https://huggingface.co/api/models", params=params)
+            r.raise_for_status()
+            data = r.json()
+            # Return compact fields
+            models = [
+                {
+                    "id": m.get("id"),
+                    "likes": m.get("likes"),
+                    "downloads": m.get("downloads") or m.get("downloadsAllTime"),
+                    "tags": m.get("tags"),
+                    "updatedAt": m.get("lastModified"),
+                }
+                for m in data
+            ]
+            result = {"models": models}
+            _trending_cache["data"] = result
+            _trending_cache["ts"] = time.monotonic()
+            return result
     except Exception as e:
         return {"models": [], "error": str(e)}
 
@@ -291,7 +442,7 @@ class LocalModelDownloadRequest(BaseModel):
 
 
 @app.post("/models/local/download")
-async def local_model_download(req: LocalModelDownloadRequest):
+async def local_model_download(req: LocalModelDownloadRequest, request: Request):
     """
     Start downloading a model snapshot into the local models directory.
     Returns a download_id for progress tracking.
@@ -316,14 +467,16 @@ async def local_model_download(req: LocalModelDownloadRequest):
         
         # Validate token if provided
         if req.hf_token:
-            import requests
             headers = {"Authorization": f"Bearer {req.hf_token}"}
-            r = requests.get("https://huggingface.co/api/whoami-v2", headers=headers, timeout=10)
+            r = await request.app.state.http.get(_HF_WHOAMI_URL, headers=headers, timeout=10)
             if r.status_code != 200:
                 raise HTTPException(status_code=401, detail="Invalid Hugging Face token")
             logger.info("HF token validated successfully")
         
-        download_id = model_registry.start_download(req.repo_id, req.hf_token)
+        try:
+            download_id = model_registry.start_download(req.repo_id, req.hf_token)
+        except DownloadBusyError:
+            raise HTTPException(status_code=503, detail="Server busy: too many downloads in progress")
         logger.info(f"Download started with ID: {download_id}")
         return {"ok": True, "download_id": download_id, "repo_id": req.repo_id}
     except HTTPException:
@@ -414,11 +567,10 @@ class HFApiTestRequest(BaseModel):
 
 
 @app.post("/hf-validate")
-async def validate_hf_token(req: HFApiTestRequest):
+async def validate_hf_token(req: HFApiTestRequest, request: Request):
     try:
-        import requests
         headers = {"Authorization": f"Bearer {req.hf_token}"}
-        r = requests.get("https://huggingface.co/api/whoami-v2", headers=headers, timeout=10)
+        r = await request.app.state.http.get(_HF_WHOAMI_URL, headers=headers, timeout=10)
         if r.status_code == 200:
             return {"valid": True, "message": "Token is valid"}
         if r.status_code == 401:
@@ -1,11 +1,15 @@
+import functools
 import logging
+import os
 import threading
 import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Optional
 
 import numpy as np
+import requests
 from PIL import Image, ImageEnhance, ImageFilter
 
 from ..core.config import settings
@@ -14,24 +18,137 @@ from .local_pipelines import generate_local_video, resolve_local_repo_id
 
 logger = logging.getLogger(__name__)
 
+try:  # Optional: fused post-processing kernel for placeholder frames
+    from numba import njit
+except Exception:  # pragma: no cover - numba not installed
+    njit = None
+
+
+if njit is not None:
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _postprocess_frame(flowed, out, exposure, g_scale, b_scale, noise, grain_sigma):
+        """Exposure, white balance and film grain in one pass over the frame."""
+        h, w = flowed.shape[0], flowed.shape[1]
+        for y in range(h):
+            for x in range(w):
+                r = min(max(flowed[y, x, 0] * exposure, 0.0), 255.0)
+                g = min(max(flowed[y, x, 1] * exposure, 0.0), 255.0) * g_scale
+                b = min(max(flowed[y, x, 2] * exposure, 0.0), 255.0) * b_scale
+                r += noise[y, x, 0] * grain_sigma
+                g += noise[y, x, 1] * grain_sigma
+                b += noise[y, x, 2] * grain_sigma
+                out[y, x, 0] = np.uint8(min(max(r, 0.0), 255.0))
+                out[y, x, 1] = np.uint8(min(max(g, 0.0), 255.0))
+                out[y, x, 2] = np.uint8(min(max(b, 0.0), 255.0))
+else:
+    _postprocess_frame = None
+
+try:  # Optional: CUDA path for placeholder frames
+    import torch
+    import torch.nn.functional as F
+except Exception:  # pragma: no cover - torch not installed
+    torch = None
+    F = None
+
+
+@functools.lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    try:
+        return torch is not None and torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+def _camera_matrix(t: float, center: tuple[float, float]) -> np.ndarray:
+    """2x3 camera affine at time ``t`` in [0, 1]: subpixel pan, small zoom and rotation."""
+    import cv2
+    tx = 2.0 * np.cos(2 * np.pi * t)  # pixels
+    ty = 2.0 * np.sin(2 * np.pi * t)
+    zoom = 1.0 + 0.01 * np.sin(2 * np.pi * t)
+    angle = 1.5 * np.sin(2 * np.pi * t + np.pi / 4.0)  # degrees
+
+    # Build affine transform: scale -> rotate -> translate
+    M = cv2.getRotationMatrix2D(center, angle, zoom)
+    M[0, 2] += tx
+    M[1, 2] += ty
+    return M
+
+
+@functools.lru_cache(maxsize=32)
+def _get_font(size: int):
+    """Load (once per size) a common TTF font, falling back to PIL's default."""
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype("arial.ttf", size=size)
+    except Exception:
+        return _default_font()
+
+
+@functools.lru_cache(maxsize=1)
+def _default_font():
+    from PIL import ImageFont
+    return ImageFont.load_default()
+
+
+# Per-repo caps on HF Inference API parameters. These models converge well
+# before 50 steps, so capping trims server time and time to first byte.
+_HF_MODEL_LIMITS: dict[str, dict[str, int]] = {
+    "damo-vilab/text-to-video-ms-1.7b": {"max_inference_steps": 25},
+    "ali-vilab/text-to-video-ms-1.7b": {"max_inference_steps": 25},
+    "cerspense/zeroscope_v2_576w": {"max_inference_steps": 25},
+    "lightx2v/Wan2.2-Lightning": {"max_inference_steps": 8},
+}
+_HF_DEFAULT_MAX_STEPS = 50
+
+# Shared by every placeholder job (Generator draws are internally locked).
+_NOISE_RNG = np.random.Generator(np.random.PCG64DXSM())
+
+# Peak flow displacement (pixels) below which the flow remap is skipped.
+_FLOW_EPS = 0.05
+
+# Frames buffered between pipeline stages in _save_frames before producers block.
+_PIPELINE_DEPTH = 8
+_END = object()
+
+# Status writers lock one of a fixed set of stripes chosen by job id, so the
+# locks don't accumulate per job for the life of the process.
+_STATUS_LOCK_STRIPES = 32
+
+
+class GeneratorBusyError(RuntimeError):
+    """Raised when every generation slot is occupied."""
+
 
 class VideoGenerator:
-    def __init__(self, video_storage):
+    def __init__(self, video_storage, max_inflight: int | None = None):
         self.video_storage = video_storage
         self.hf_token: str | None = None
+        # Each job's status dict is replaced, never mutated, so readers can take
+        # it without locking; writers only serialize against the same stripe.
         self.generation_status: dict[str, dict[str, Any]] = {}
-        self._status_lock = threading.Lock()
+        self._status_locks = tuple(threading.Lock() for _ in range(_STATUS_LOCK_STRIPES))
+        # Bounds concurrently running jobs so bursts cannot exhaust GPU memory.
+        self._job_slots = threading.BoundedSemaphore(max(1, max_inflight or settings.max_inflight_gen))
+        # Shared keep-alive session so HF calls (and the 404 retry) reuse connections.
+        self._http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+        self._http.mount("https://", adapter)
         # Local model registry is used lazily when a local model is requested.
         self._model_registry = get_local_model_registry()
+        # repo_id -> in-flight registry lookup started when the job was queued,
+        # so the directory walk in model_info overlaps thread start-up.
+        self._registry_warm: dict[str, Future] = {}
+        self._registry_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="registry-warm")
 
     def set_hf_token(self, token: str) -> None:
         self.hf_token = token
 
     def _update_generation_status(self, job_id: str, **kwargs) -> None:
-        with self._status_lock:
-            status = self.generation_status.get(job_id, {})
-            status.update(kwargs)
-            self.generation_status[job_id] = status
+        with self._status_locks[hash(job_id) % len(self._status_locks)]:
+            self.generation_status[job_id] = {**self.generation_status.get(job_id, {}), **kwargs}
+
+    def get_generation_status(self, job_id: str) -> dict[str, Any] | None:
+        return self.generation_status.get(job_id)
 
     def generate_video(
         self,
@@ -74,12 +191,19 @@ class VideoGenerator:
             "use_hf_api": use_hf_api,
         }
 
+        if not self._job_slots.acquire(blocking=False):
+            raise GeneratorBusyError("All generation slots are busy")
+
         meta = self.video_storage.create_video_entry(params)
         if not meta:
+            self._job_slots.release()
             self._update_generation_status(job_id, status="failed", error="storage init failed")
             return {"job_id": job_id, "status": "failed"}
 
         video_id = meta["id"]
+        repo_id = resolve_local_repo_id(local_model_key) if local_model_key else None
+        if repo_id:
+            self._registry_warm[repo_id] = self._registry_pool.submit(self._model_registry.model_info, repo_id)
         self._update_generation_status(
             job_id,
             status="pending",
@@ -108,7 +232,11 @@ class VideoGenerator:
                 local_model_key,
             ),
         )
-        thread.start()
+        try:
+            thread.start()
+        except Exception:
+            self._job_slots.release()
+            raise
 
         return {"job_id": job_id, "status": "pending", "video_id": video_id}
 
@@ -135,6 +263,7 @@ class VideoGenerator:
             self._update_generation_status(job_id, status="processing", progress=10, message="Preparing request")
 
             frames = None
+            saved_frames = 0
             local_error: Optional[str] = None
 
             # 1) Try local model first when requested.
@@ -183,13 +312,14 @@ class VideoGenerator:
                     seed,
                     model_repo=hf_model_repo,
                 )
-                if isinstance(result, dict) and "video_bytes" in result:
-                    # Save video bytes and extract frames
+                if isinstance(result, dict) and "video_stream" in result:
+                    # Stream the video to disk and extract frames
                     self._update_generation_status(job_id, progress=60, message="Downloading and saving video")
                     video_dir = Path(self.video_storage.storage_base_path) / video_id
                     video_dir.mkdir(parents=True, exist_ok=True)
-                    if not self.video_storage.save_video_bytes(video_dir, result["video_bytes"]):
-                        raise RuntimeError("Failed to save video file from HF response")
+                    with result["video_stream"] as resp:
+                        if not self.video_storage.save_video_stream(video_dir, resp):
+                            raise RuntimeError("Failed to save video file from HF response")
                     self._update_generation_status(job_id, progress=75, message="Extracting frames")
                     saved_frames = self.video_storage.extract_frames_from_video(video_dir, fps)
                     frames = None  # Explicitly indicate we already saved frames
@@ -204,21 +334,20 @@ class VideoGenerator:
                     raise RuntimeError(local_error)
                 # Fallback to placeholder motion to keep pipeline functional.
                 self._update_generation_status(job_id, progress=30, message="Using placeholder local generator")
-                frames = self._create_placeholder_frames(width, height, num_frames, prompt)
+                # Streamed so saving and muxing overlap frame synthesis.
+                base = self._placeholder_base(width, height, prompt)
+                frames = self._iter_motion_frames(base, num_frames)
 
             if frames is None:
-                # Frames already extracted from saved video
-                video_meta = self.video_storage.get_video(video_id)
-                saved = video_meta.get("frame_count", 0) if video_meta else 0
-                if not saved:
-                    # If not updated yet, try to count on disk
-                    video_dir = Path(self.video_storage.storage_base_path) / video_id
-                    saved = len(sorted(video_dir.glob("frame_*.png")))
+                # Frames already extracted from saved video; the extractor counted them.
+                saved = saved_frames
             else:
-                if not isinstance(frames, list) or len(frames) == 0:
+                if isinstance(frames, (list, np.ndarray)) and len(frames) == 0:
                     raise RuntimeError("No frames generated")
                 self._update_generation_status(job_id, status="processing", progress=80, message="Saving frames")
                 saved = self._save_frames(video_id, frames)
+                if not saved:
+                    raise RuntimeError("No frames generated")
 
             # Persist frame count
             try:
@@ -231,6 +360,8 @@ class VideoGenerator:
         except Exception as e:
             elapsed = time.time() - started
             self._update_generation_status(job_id, status="failed", error=str(e), message="Failed", elapsed_seconds=elapsed)
+        finally:
+            self._job_slots.release()
 
     def _generate_with_hf_api(
         self,
@@ -247,8 +378,8 @@ class VideoGenerator:
     ):
         if not token or not token.startswith("hf_"):
             raise ValueError("Invalid Hugging Face API token")
-        import requests
         repo = (model_repo or settings.hf_model_repo).strip()
+        max_steps = _HF_MODEL_LIMITS.get(repo, {}).get("max_inference_steps", _HF_DEFAULT_MAX_STEPS)
         # Prefer new Inference Providers router root endpoint with model via header
         ROOT_URL = "https://router.huggingface.co/hf-inference"
         MODELS_URL = f"https://router.huggingface.co/hf-inference/models/{repo}"
@@ -263,7 +394,7 @@ class VideoGenerator:
                 "negative_prompt": negative_prompt or "blurry, low quality, noisy",
                 "height": min(height, 576),
                 "width": min(width, 1024),
-                "num_inference_steps": min(num_inference_steps, 50),
+                "num_inference_steps": min(num_inference_steps, max_steps),
                 "guidance_scale": guidance_scale,
                 "num_frames": max(8, num_frames),
                 "fps": 8,
@@ -277,11 +408,12 @@ class VideoGenerator:
             if not use_root:
                 # When addressing model path directly, drop X-Requested-Model
                 h.pop("X-Requested-Model", None)
-            resp = requests.post(url, headers=h, json=payload, timeout=settings.hf_timeout_seconds)
-            # Try to parse JSON error bodies
+            resp = self._http.post(url, headers=h, json=payload, timeout=settings.hf_timeout_seconds, stream=True)
             ctype = resp.headers.get('content-type', '')
             if resp.status_code == 200 and (ctype.startswith('video') or ctype.startswith('application/octet-stream')):
-                return {"video_bytes": resp.content}
+                # Caller streams the body to disk and closes the response.
+                return {"video_stream": resp}
+            # Try to parse JSON error bodies
             try:
                 js = resp.json()
                 if isinstance(js, dict) and js.get('error'):
@@ -300,29 +432,27 @@ class VideoGenerator:
                 raise RuntimeError("HF API error: 404: Not Found (both router root and model endpoints)")
         return out
 
-    def _create_placeholder_frames(self, width: int, height: int, num_frames: int, prompt: str) -> list[np.ndarray]:
+    def _create_placeholder_frames(self, width: int, height: int, num_frames: int, prompt: str) -> np.ndarray:
         """
         Create simple motion frames locally as a graceful fallback when no local T2V model is installed.
         Uses a base image synthesized from the prompt text and applies subtle camera and flow motion.
         """
+        base = self._placeholder_base(width, height, prompt)
+        return self._create_motion_from_base(base, num_frames)
+
+    def _placeholder_base(self, width: int, height: int, prompt: str) -> Image.Image:
         # Create a basic base image with prompt text
         base = Image.new('RGB', (width, height), color=(10, 10, 15))
         try:
-            from PIL import ImageDraw, ImageFont
+            from PIL import ImageDraw
             draw = ImageDraw.Draw(base)
             text = (prompt or "AI Video").strip()[:60]
-            # Try to load a common font; fallback to default
-            try:
-                font = ImageFont.truetype("arial.ttf", size=max(18, min(width, height)//18))
-            except Exception:
-                font = ImageFont.load_default()
+            font = _get_font(max(18, min(width, height)//18))
             tw, th = draw.textbbox((0, 0), text, font=font)[2:]
             draw.text(((width - tw)//2, (height - th)//2), text, fill=(139, 92, 246), font=font)
         except Exception:
             pass
-        base = self._enhance_image(base)
-        frames = self._create_motion_from_base(base, num_frames)
-        return frames
+        return self._enhance_image(base)
 
     def _generate_with_local_model(
         self,
@@ -346,7 +476,11 @@ class VideoGenerator:
             raise RuntimeError(f"Unknown local model key: {local_model_key}")
 
         registry = self._model_registry
-        info = registry.model_info(repo_id)
+        warm = self._registry_warm.pop(repo_id, None)
+        try:
+            info = warm.result(timeout=30) if warm is not None else registry.model_info(repo_id)
+        except Exception:
+            info = registry.model_info(repo_id)
         if not info.get("downloaded"):
             raise RuntimeError(
                 f"Local model '{repo_id}' is not downloaded. Trigger a download from the UI before using it."
@@ -383,108 +517,320 @@ class VideoGenerator:
         except Exception:
             return image
 
-    def _create_motion_from_base(self, base_image: Image.Image, num_frames: int) -> list[np.ndarray]:
+    def _create_motion_from_base(
+        self, base_image: Image.Image, num_frames: int, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Animate ``base_image`` into a contiguous ``(num_frames, H, W, C)`` uint8 batch.
+
+        Frames are written into ``out`` when given, otherwise into a freshly
+        allocated buffer; ``frames[i]`` is a view into that one block.
+        """
+        if out is None:
+            out = np.empty((num_frames, *np.asarray(base_image).shape), dtype=np.uint8)
+        for _ in self._iter_motion_frames(base_image, num_frames, out):
+            pass
+        return out
+
+    def _iter_motion_frames(self, base_image: Image.Image, num_frames: int, out: np.ndarray | None = None):
+        """Yield the animated frames of ``base_image`` one at a time.
+
+        Each yielded frame is a view of its own slot in the ``out`` batch, so
+        consumers may hold on to it after the next frame is produced.
+        """
         import cv2
-        rng = np.random.default_rng()
-        base = np.array(base_image).astype(np.float32)
+        rng = _NOISE_RNG
+        # Stays uint8: OpenCV warps uint8 natively and the post-processing
+        # below runs in uint16/int16 fixed point, not float32 frames.
+        base = np.array(base_image)
         h, w = base.shape[:2]
-        frames: list[np.ndarray] = []
+        if out is None:
+            out = np.empty((num_frames, *base.shape), dtype=np.uint8)
+        frames = out
+
+        if _cuda_available() and base.ndim == 3:
+            yield from self._iter_motion_frames_cuda(base, num_frames, out, rng)
+            return
 
         # Precompute gentle per-pixel displacement field (Perlin-like noise)
         noise_scale = 0.005
-        yy, xx = np.mgrid[0:h, 0:w]
+        yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
         noise_phase = rng.random() * 2 * np.pi
         disp_x = (np.sin(xx * noise_scale + noise_phase) * np.cos(yy * noise_scale * 1.3 + noise_phase)).astype(np.float32)
         disp_y = (np.cos(xx * noise_scale * 0.9 + noise_phase) * np.sin(yy * noise_scale + noise_phase)).astype(np.float32)
-
+        flow_strength = 0.6
+        center = (w / 2.0, h / 2.0)
+
+        # Scratch buffers reused by every frame for the sampling maps.
+        src_x = np.empty((h, w), dtype=np.float32)
+        src_y = np.empty((h, w), dtype=np.float32)
+        map_x = np.empty((h, w), dtype=np.float32)
+        map_y = np.empty((h, w), dtype=np.float32)
+
+        # Film grain: one 256x256 noise tile tiled to (H+256, W+256); each frame
+        # reads a randomly offset H x W window (a view) instead of sampling anew.
+        tile = 256
+        noise_tile = np.empty((tile, tile, base.shape[2]), dtype=np.float32)
+        rng.standard_normal(dtype=np.float32, out=noise_tile)
+        noise_tile *= 0.75
+        np.rint(noise_tile, out=noise_tile)
+        noise_field = np.tile(noise_tile.astype(np.int16), (h // tile + 2, w // tile + 2, 1))[: h + tile, : w + tile]
+
+        # uint16 scratch for the NumPy fallback; scales are 1.7 fixed point
+        # (x128) so 255 * 1.03 * 128 still fits.
+        frame = np.empty(base.shape, dtype=np.uint16)
+        signed = frame.view(np.int16)
         for i in range(num_frames):
             t = i / max(1, num_frames - 1)
 
-            # Camera motion parameters (subpixel translations, small zoom and rotation)
-            tx = 2.0 * np.cos(2 * np.pi * t)  # pixels
-            ty = 2.0 * np.sin(2 * np.pi * t)
-            zoom = 1.0 + 0.01 * np.sin(2 * np.pi * t)
-            angle = 1.5 * np.sin(2 * np.pi * t + np.pi / 4.0)  # degrees
+            M = _camera_matrix(t, center)
 
-            # Build affine transform: scale -> rotate -> translate
-            center = (w / 2.0, h / 2.0)
-            M = cv2.getRotationMatrix2D(center, angle, zoom)
-            M[0, 2] += tx
-            M[1, 2] += ty
-
-            warped = cv2.warpAffine(base, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
-
-            # Time-varying subtle displacement (flow) to avoid strictly rigid motion
-            flow_strength = 0.6
-            fx = disp_x * flow_strength * np.sin(2 * np.pi * (t + 0.15))
-            fy = disp_y * flow_strength * np.cos(2 * np.pi * (t + 0.3))
-            map_x = (xx + fx).astype(np.float32)
-            map_y = (yy + fy).astype(np.float32)
-            flowed = cv2.remap(warped, map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+            # Time-varying subtle displacement (flow) to avoid strictly rigid motion.
+            # The flow offsets where the warped image is sampled, so composing it
+            # with the inverse affine lets a single remap replace warpAffine+remap.
+            flow_x = flow_strength * np.sin(2 * np.pi * (t + 0.15))
+            flow_y = flow_strength * np.cos(2 * np.pi * (t + 0.3))
+            if max(abs(flow_x), abs(flow_y)) < _FLOW_EPS:
+                # Flow is sub-visible here: a plain warp skips building the maps.
+                flowed = cv2.warpAffine(base, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+            else:
+                np.multiply(disp_x, flow_x, out=src_x)
+                src_x += xx
+                np.multiply(disp_y, flow_y, out=src_y)
+                src_y += yy
+                inv = cv2.invertAffineTransform(M)
+                cv2.addWeighted(src_x, inv[0, 0], src_y, inv[0, 1], inv[0, 2], dst=map_x)
+                cv2.addWeighted(src_x, inv[1, 0], src_y, inv[1, 1], inv[1, 2], dst=map_y)
+                flowed = cv2.remap(base, map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
 
             # Subtle exposure/temperature changes for liveliness
             exposure = 1.0 + 0.03 * np.sin(2 * np.pi * (t + 0.1))
             temp = 1.0 + 0.02 * np.cos(2 * np.pi * (t + 0.2))
-            frame = flowed.copy()
-            frame = np.clip(frame * exposure, 0, 255)
+            g_scale = 0.995 + 0.01 * (2 - temp)
+            oy, ox = rng.integers(0, tile, 2)
+            grain = noise_field[oy:oy + h, ox:ox + w]
+            if _postprocess_frame is not None and flowed.ndim == 3 and flowed.shape[2] == 3:
+                _postprocess_frame(flowed, frames[i], exposure, g_scale, temp, grain, 1.0)
+                yield frames[i]
+                continue
+
+            # NumPy fallback, computed in place in one reused uint16 buffer.
+            np.multiply(flowed, int(round(exposure * 128)), out=frame, dtype=np.uint16)
+            np.add(frame, 64, out=frame)  # round to nearest on the shift
+            np.right_shift(frame, 7, out=frame)
+            np.minimum(frame, 255, out=frame)
             # apply simple white-balance-like shift
             if frame.ndim == 3 and frame.shape[2] >= 3:
-                frame[..., 0] *= 1.0  # R
-                frame[..., 1] *= (0.995 + 0.01 * (2 - temp))  # G
-                frame[..., 2] *= (1.0 * temp)  # B
-
-            # Add tiny film-grain noise
-            noise = rng.normal(0, 0.75, size=frame.shape).astype(np.float32)
-            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+                frame[..., 1] *= int(round(g_scale * 128))  # G
+                frame[..., 1] >>= 7
+                frame[..., 2] *= int(round(temp * 128))  # B
+                frame[..., 2] >>= 7
+
+            # Add tiny film-grain noise; values are <= 255 so the int16 view
+            # of the buffer holds the same numbers and can go negative.
+            np.add(signed, grain, out=signed)
+            np.clip(signed, 0, 255, out=signed)
+            frames[i] = signed
+            yield frames[i]
+
+    def _iter_motion_frames_cuda(self, base: np.ndarray, num_frames: int, out: np.ndarray, rng, chunk: int = 16):
+        """CUDA counterpart of the CPU loop in ``_iter_motion_frames``.
+
+        Warps ``chunk`` frames per batched ``grid_sample`` call and does the
+        exposure/white-balance/grain pass with fused tensor ops, then copies
+        each chunk back into ``out`` through a pinned host buffer.
+        """
+        import cv2
+        dev = torch.device("cuda")
+        h, w, c = base.shape
 
-            frames.append(frame)
+        noise_scale = 0.005
+        yy, xx = torch.meshgrid(
+            torch.arange(h, device=dev, dtype=torch.float32),
+            torch.arange(w, device=dev, dtype=torch.float32),
+            indexing="ij",
+        )
+        noise_phase = rng.random() * 2 * np.pi
+        disp_x = torch.sin(xx * noise_scale + noise_phase) * torch.cos(yy * noise_scale * 1.3 + noise_phase)
+        disp_y = torch.cos(xx * noise_scale * 0.9 + noise_phase) * torch.sin(yy * noise_scale + noise_phase)
+        flow_strength = 0.6
+        center = (w / 2.0, h / 2.0)
+
+        src = torch.from_numpy(base).to(dev).float().permute(2, 0, 1).unsqueeze(0)
+        tile = 256
+        noise_tile = torch.from_numpy(rng.standard_normal((tile, tile, c), dtype=np.float32)).to(dev)
+        noise_field = (noise_tile * 0.75).repeat(h // tile + 2, w // tile + 2, 1)[: h + tile, : w + tile]
+        host = torch.empty((min(chunk, num_frames), h, w, c), dtype=torch.uint8, pin_memory=True)
+
+        def per_frame(values) -> "torch.Tensor":
+            return torch.as_tensor(np.asarray(values, dtype=np.float32), device=dev).view(-1, 1, 1)
+
+        for start in range(0, num_frames, chunk):
+            n = min(chunk, num_frames - start)
+            t = np.arange(start, start + n) / max(1, num_frames - 1)
+            inv = torch.as_tensor(
+                np.stack([cv2.invertAffineTransform(_camera_matrix(ti, center)) for ti in t]).astype(np.float32),
+                device=dev,
+            ).view(n, 2, 3, 1, 1)
+            src_x = xx + disp_x * per_frame(flow_strength * np.sin(2 * np.pi * (t + 0.15)))
+            src_y = yy + disp_y * per_frame(flow_strength * np.cos(2 * np.pi * (t + 0.3)))
+            map_x = inv[:, 0, 0] * src_x + inv[:, 0, 1] * src_y + inv[:, 0, 2]
+            map_y = inv[:, 1, 0] * src_x + inv[:, 1, 1] * src_y + inv[:, 1, 2]
+            # grid_sample wants sampling coordinates normalised to [-1, 1].
+            grid = torch.stack((map_x * (2.0 / (w - 1)) - 1.0, map_y * (2.0 / (h - 1)) - 1.0), dim=-1)
+            frame = F.grid_sample(
+                src.expand(n, -1, -1, -1), grid, mode="bilinear", padding_mode="reflection", align_corners=True
+            )
 
-        return frames
+            temp = 1.0 + 0.02 * np.cos(2 * np.pi * (t + 0.2))
+            frame.mul_(per_frame(1.0 + 0.03 * np.sin(2 * np.pi * (t + 0.1))).unsqueeze(1)).clamp_(0, 255)
+            frame[:, 1] *= per_frame(0.995 + 0.01 * (2 - temp))
+            frame[:, 2] *= per_frame(temp)
+            offsets = rng.integers(0, tile, (n, 2))
+            grain = torch.stack([noise_field[oy:oy + h, ox:ox + w] for oy, ox in offsets])
+            frame.add_(grain.permute(0, 3, 1, 2)).clamp_(0, 255)
+
+            host[:n].copy_(frame.to(torch.uint8).permute(0, 2, 3, 1))
+            out[start:start + n] = host[:n].numpy()
+            for i in range(start, start + n):
+                yield out[i]
 
     def _save_frames(self, video_id: str, frames) -> int:
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        """Encode output.mp4 in a single pass while ``frames`` is still being produced.
+
+        ``frames`` may be a list, a batch array or a generator. The calling
+        thread only produces frames; a muxer thread feeds them to the video
+        encoder through a bounded queue, so a slow encoder applies
+        back-pressure instead of buffering. Only frame 0 is written as a PNG
+        (for the thumbnail), so a failed mux raises rather than retrying.
+        If the first frame cannot be muxed from memory, every frame is
+        written as a PNG and the video is stitched from disk.
+
+        Returns the number of frames stored.
+        """
+        import queue
+        import cv2
         video_dir = Path(self.video_storage.storage_base_path) / video_id
         video_dir.mkdir(parents=True, exist_ok=True)
 
         def save_one(i: int, arr) -> bool:
+            path = video_dir / f"frame_{i:04d}.png"
             try:
                 if hasattr(arr, 'numpy'):
                     arr = arr.numpy()
-                if not isinstance(arr, Image.Image):
-                    try:
-                        arr = np.ascontiguousarray(arr)
-                    except Exception:
-                        pass
-                    img = Image.fromarray(arr)
-                else:
-                    img = arr
-                img.save(video_dir / f"frame_{i:04d}.png")
+                if isinstance(arr, Image.Image):
+                    if arr.mode not in ("RGB", "RGBA", "L"):
+                        arr.save(path)
+                        return True
+                    arr = np.asarray(arr)
+                arr = np.ascontiguousarray(arr)
+                # uint8 arrays go straight to OpenCV's encoder, which releases
+                # the GIL so the writer threads encode in parallel; PIL's PNG
+                # encoder holds it. Anything else still goes through PIL.
+                if arr.dtype == np.uint8 and (arr.ndim == 2 or (arr.ndim == 3 and arr.shape[2] in (1, 3, 4))):
+                    if arr.ndim == 3 and arr.shape[2] == 3:
+                        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+                    elif arr.ndim == 3 and arr.shape[2] == 4:
+                        arr = cv2.cvtColor(arr, cv2.COLOR_RGBA2BGRA)
+                    return bool(cv2.imwrite(str(path), arr))
+                Image.fromarray(arr).save(path)
                 return True
             except Exception as e:
                 logger.error(f"Error saving frame {i}: {e}")
                 return False
 
-        saved = 0
-        with ThreadPoolExecutor(max_workers=min(8, len(frames) or 1)) as ex:
-            futures = [ex.submit(save_one, i, f) for i, f in enumerate(frames)]
-            for fut in as_completed(futures):
-                try:
-                    if fut.result():
-                        saved += 1
-                except Exception:
-                    pass
+        def as_rgb(frame):
+            # Only PIL images and uint8 HWC arrays can be muxed from memory.
+            if isinstance(frame, Image.Image):
+                return np.asarray(frame if frame.mode == "RGB" else frame.convert("RGB"))
+            if isinstance(frame, np.ndarray) and frame.dtype == np.uint8 and frame.ndim == 3:
+                return frame
+            return None
+
+        meta = self.video_storage.get_video(video_id) or {}
+        params = meta.get('params') or {}
+        fps = params.get('fps', 8)
+
+        save_q: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        mux_q: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        mux_done = threading.Event()
+
+        def writer() -> int:
+            count = 0
+            while True:
+                item = save_q.get()
+                if item is _END:
+                    return count
+                if save_one(*item):
+                    count += 1
+
+        def muxer() -> bool:
+            def drain():
+                while True:
+                    item = mux_q.get()
+                    if item is _END:
+                        mux_done.set()
+                        return
+                    yield item
+            try:
+                return self.video_storage._write_mp4(video_dir, drain(), fps, "rgb24")
+            except Exception as e:
+                logger.error(f"Error creating video file: {e}")
+                return False
+            finally:
+                # Keep consuming so the producer never blocks on a stopped muxer.
+                while not mux_done.is_set():
+                    if mux_q.get() is _END:
+                        mux_done.set()
+
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            return 0
+        first_rgb = as_rgb(first)
+        # Muxing from memory keeps nothing but frame 0 (for the thumbnail), so a
+        # failed mux cannot be retried and fails the job. Frames that can't be
+        # muxed from memory are all written as PNGs and stitched from disk.
+        mux_ok = first_rgb is not None
+        n_writers = 1 if mux_ok else min(os.cpu_count() or 1, 8)
+        produced = 0
+        with ThreadPoolExecutor(max_workers=n_writers + 1) as ex:
+            mux = ex.submit(muxer) if mux_ok else None
+            writers = [ex.submit(writer) for _ in range(n_writers)]
+            try:
+                save_q.put((0, first))
+                if mux_ok:
+                    mux_q.put(first_rgb)
+                produced = 1
+                for i, frame in enumerate(frames, start=1):
+                    if mux_ok:
+                        rgb = as_rgb(frame)
+                        if rgb is None:
+                            raise RuntimeError(f"Frame {i} cannot be encoded alongside the earlier frames")
+                        mux_q.put(rgb)
+                    else:
+                        save_q.put((i, frame))
+                    produced += 1
+            finally:
+                for _ in writers:
+                    save_q.put(_END)
+                if mux_ok:
+                    mux_q.put(_END)
+            saved = sum(f.result() for f in writers)
+            muxed = mux_ok and mux.result()
+        if mux_ok:
+            if not muxed:
+                raise RuntimeError("Failed to encode output.mp4")
+            saved = produced
 
         try:
-            self.video_storage._create_thumbnail(video_dir)
+            # Thumbnail from the frame still in memory rather than re-decoding frame_0000.png.
+            first_bgr = cv2.cvtColor(first_rgb, cv2.COLOR_RGB2BGR) if first_rgb is not None else None
+            self.video_storage._create_thumbnail(video_dir, first_bgr)
         except Exception:
             pass
         try:
-            meta = self.video_storage.get_video(video_id) or {}
-            params = meta.get('params') or {}
-            fps = params.get('fps', 8)
-            # Only stitch video if we actually saved frames
-            # Pass None to let _create_video_file check for frame files on disk
-            if saved > 0:
+            # Fall back to stitching the saved frame files from disk
+            if saved > 0 and not muxed:
                 self.video_storage._create_video_file(video_dir, None, fps)
         except Exception as e:
             logger.error(f"Error creating video file: {e}")
@@ -1,12 +1,23 @@
+import contextlib
+import functools
 import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
 import numpy as np
 from PIL import Image
 
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Let safetensors deserialize straight into GPU memory when loading on CUDA.
+os.environ.setdefault("SAFETENSORS_FAST_GPU", "1")
+
 try:  # Import lazily-safe for environments without heavy deps installed yet
     import torch
     from diffusers import DiffusionPipeline
@@ -46,6 +57,31 @@ except Exception:  # pragma: no cover - handled at runtime
     DiffusionPipeline = None  # type: ignore
 
 
+try:  # Optional: fused normalise + cast kernel for float frames
+    from numba import njit
+except Exception:  # pragma: no cover - numba not installed
+    njit = None
+
+
+if njit is not None:
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _norm_to_u8(src, dst, scale, bias):
+        """dst = clip(src * scale + bias, 0, 255) as uint8, in one pass over an HWC frame."""
+        for i in range(src.shape[0]):
+            for j in range(src.shape[1]):
+                for c in range(src.shape[2]):
+                    v = src[i, j, c] * scale + bias
+                    dst[i, j, c] = 0 if v < 0.0 else (255 if v > 255.0 else np.uint8(v))
+else:
+    _norm_to_u8 = None
+
+
+try:  # Optional: DeepCache feature reuse across denoising steps
+    from DeepCache import DeepCacheSDHelper
+except Exception:  # pragma: no cover - DeepCache not installed
+    DeepCacheSDHelper = None
+
+
 # Mapping between frontend local model keys and Hugging Face repos
 LOCAL_MODEL_REPOS: Dict[str, str] = {
     "zeroscope-local": "cerspense/zeroscope_v2_576w",
@@ -58,10 +94,12 @@ def resolve_local_repo_id(local_model_key: str) -> Optional[str]:
     return LOCAL_MODEL_REPOS.get(local_model_key)
 
 
+@functools.lru_cache(maxsize=1)
 def _pick_device_and_dtype():
     """Choose the best available device and dtype.
 
     GPU is preferred when `torch.cuda.is_available()` is true; otherwise CPU.
+    The probe can cost a CUDA driver round-trip, so the answer is cached.
     """
     if torch is None:  # diffusers/torch not installed
         raise RuntimeError("Local models require 'torch' and 'diffusers' to be installed in the backend environment.")
@@ -71,7 +109,49 @@ def _pick_device_and_dtype():
     return torch.device("cpu"), torch.float32
 
 
+# Share of VRAM the weights may take and still load whole onto the GPU; the
+# rest is left for activations and the many-frame VAE decode.
+_VRAM_WEIGHT_FRACTION = 0.6
+
+
+def _weights_fit_in_vram(repo_dir: Path) -> bool:
+    """Whether the checkpoint's weight files fit comfortably in device 0's VRAM.
+
+    On-disk size is used as the estimate (fp32 checkpoints shrink when loaded
+    as fp16, so this errs towards offloading).
+    """
+    try:
+        weights = sum(
+            f.stat().st_size for f in repo_dir.rglob("*")
+            if f.suffix in (".safetensors", ".bin", ".pt", ".pth", ".ckpt") and f.is_file()
+        )
+        total = torch.cuda.get_device_properties(0).total_memory
+        return weights <= total * _VRAM_WEIGHT_FRACTION
+    except Exception:
+        return False
+
+
+def _load_pipeline(repo_dir: Path, dtype, device, use_safetensors: bool, on_device: bool):
+    """Load a pipeline, placing weights straight on the GPU when diffusers allows it.
+
+    Returns ``(pipe, on_device)``. With ``on_device`` (the weights fit in
+    VRAM) and ``device_map`` the safetensors shards are read directly onto
+    the device instead of into host RAM followed by a full host-to-device
+    copy; older diffusers reject it and load on CPU. Without it the pipeline
+    stays on CPU so the caller can enable model CPU offload instead.
+    """
+    kwargs = {"torch_dtype": dtype, "use_safetensors": use_safetensors, "low_cpu_mem_usage": True}
+    if device.type == "cuda" and on_device:
+        try:
+            return DiffusionPipeline.from_pretrained(repo_dir, device_map=device.type, **kwargs), True
+        except (TypeError, ValueError, NotImplementedError) as e:
+            logger.info("device_map loading unavailable (%s); loading on CPU first", e)
+    return DiffusionPipeline.from_pretrained(repo_dir, **kwargs), False
+
+
 _PIPELINE_CACHE: Dict[tuple[str, str], "DiffusionPipeline"] = {}
+# id(pipeline) -> lock serialising runs that patch the shared pipeline (DeepCache).
+_PIPELINE_LOCKS: Dict[int, threading.Lock] = {}
 
 
 def _get_pipeline(local_model_key: str, repo_dir: Path):
@@ -93,36 +173,268 @@ def _get_pipeline(local_model_key: str, repo_dir: Path):
 
     logger.info("Loading local pipeline '%s' from %s on %s", local_model_key, repo_dir, device)
 
+    # Models that don't fit in VRAM keep their weights on CPU and stream each
+    # submodule to the GPU as it runs (model CPU offload) instead of loading whole.
+    fits = device.type != "cuda" or _weights_fit_in_vram(repo_dir)
+
     # Try to load with safetensors first (CVE-2025-32434 safe), fallback to .pt files if unavailable
     try:
-        pipe = DiffusionPipeline.from_pretrained(
-            repo_dir,
-            torch_dtype=dtype,
-            use_safetensors=True,
-        )
+        pipe, on_device = _load_pipeline(repo_dir, dtype, device, use_safetensors=True, on_device=fits)
         logger.info("Loaded pipeline using safetensors (secure)")
     except Exception as e:
         logger.warning("Safetensors not available (%s), falling back to .pt files", str(e))
-        pipe = DiffusionPipeline.from_pretrained(
-            repo_dir,
-            torch_dtype=dtype,
-            use_safetensors=False,
-        )
+        pipe, on_device = _load_pipeline(repo_dir, dtype, device, use_safetensors=False, on_device=fits)
+
+    if not on_device:
+        offloaded = False
+        if not fits and hasattr(pipe, "enable_model_cpu_offload"):
+            try:  # pragma: no cover - needs accelerate and a GPU
+                pipe.enable_model_cpu_offload()
+                offloaded = True
+                logger.info("Weights exceed %.0f%% of VRAM; using model CPU offload", _VRAM_WEIGHT_FRACTION * 100)
+            except Exception as e:
+                logger.info("Model CPU offload unavailable (%s); loading onto %s", e, device)
+        if not offloaded:
+            pipe.to(device)
+
+    if device.type == "cuda":
+        _enable_memory_savers(pipe)
+        if settings.unet_quantization:
+            _quantize_unet(pipe, settings.unet_quantization.strip().lower())
+        if settings.cuda_graphs and getattr(pipe, "unet", None) is not None:
+            pipe.unet.forward = _GraphedUNet(pipe.unet.forward)
+        elif settings.torch_compile:
+            _compile_pipeline(pipe)
+
+    _PIPELINE_CACHE[cache_key] = pipe
+    return pipe, device
+
+
+def _quantize_unet(pipe, mode: str) -> None:
+    """Weight-only quantize the UNet in place with torchao ("int8" or "fp8").
+
+    The UNet dominates step time and is bandwidth-bound on its weights; the
+    VAE and text encoder are left alone to avoid visible quality loss.
+    """
+    unet = getattr(pipe, "unet", None)
+    if unet is None:
+        return
+    try:
+        from torchao.quantization import quantize_, int8_weight_only
+    except Exception:
+        logger.warning("UNet quantization '%s' requested but torchao is not installed", mode)
+        return
+    try:
+        config = int8_weight_only()
+        if mode == "fp8":
+            if torch.cuda.get_device_capability() >= (8, 9):
+                from torchao.quantization import float8_weight_only
+                config = float8_weight_only()
+            else:
+                logger.info("fp8 needs compute capability 8.9+; using int8 weight-only instead")
+        elif mode != "int8":
+            logger.warning("Unknown UNet quantization '%s'; using int8 weight-only", mode)
+        quantize_(unet, config)
+        logger.info("Quantized UNet weights (%s)", mode)
+    except Exception as e:  # pragma: no cover - depends on torchao/GPU
+        logger.warning("UNet quantization failed, keeping %s weights: %s", unet.dtype, e)
+
 
-    pipe.to(device)
+def _compile_pipeline(pipe) -> None:
+    """``torch.compile`` the UNet and VAE decode with ``mode="reduce-overhead"``.
 
-    # Optional offload hints for big models on limited VRAM
-    try:  # pragma: no cover - best-effort hints
-        if device.type == "cuda" and hasattr(pipe, "enable_model_cpu_offload"):
-            pipe.enable_model_cpu_offload()
+    Shapes are fixed by the clamping in ``generate_local_video``, so after the
+    first call per shape every step runs fused Triton kernels replayed from
+    CUDA graphs.
+    """
+    if not hasattr(torch, "compile"):
+        return
+    try:  # pragma: no cover - depends on torch/GPU
+        if getattr(pipe, "unet", None) is not None:
+            pipe.unet = torch.compile(pipe.unet, mode="reduce-overhead", fullgraph=False)
+        vae = getattr(pipe, "vae", None)
+        if vae is not None:
+            vae.decode = torch.compile(vae.decode, mode="reduce-overhead")
+        logger.info("Compiled UNet/VAE with torch.compile(mode='reduce-overhead')")
+    except Exception as e:  # pragma: no cover
+        logger.warning("torch.compile unavailable, running eager: %s", e)
+
+
+# Captured graphs each pin their own memory pool; keep only the most recent shapes.
+_MAX_CUDA_GRAPHS = 4
+
+
+class _GraphedUNet:
+    """Drop-in ``unet.forward`` that replays a captured CUDA graph per input shape.
+
+    Inputs are clamped to a small parameter cube, so each (shape, dtype, extra
+    kwargs) combination recurs across steps and requests: the first call for a
+    key warms up on a side stream and captures, later calls only copy the new
+    tensor contents into the static inputs and replay, skipping the hundreds
+    of small kernel launches per step. Anything that fails to capture runs
+    eagerly from then on. At most ``_MAX_CUDA_GRAPHS`` keys are kept, least
+    recently used first out.
+
+    One instance wraps one cached pipeline's UNet and its static inputs are
+    shared, so capture and replay are serialised by a per-instance lock for
+    jobs running concurrently on that pipeline.
+    """
+
+    def __init__(self, forward):
+        self._forward = forward
+        self._graphs: "OrderedDict[tuple, Optional[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, sample, timestep, encoder_hidden_states=None, return_dict: bool = True, **kwargs):
+        if not isinstance(timestep, torch.Tensor):
+            timestep = torch.tensor(timestep, device=sample.device)
+        timestep = timestep.to(sample.device)
+        try:
+            extra = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+        except Exception:
+            extra = None
+        if extra is None or encoder_hidden_states is None or any(isinstance(v, torch.Tensor) for v in kwargs.values()):
+            return self._forward(sample, timestep, encoder_hidden_states, return_dict=return_dict, **kwargs)
+
+        key = (tuple(sample.shape), sample.dtype, tuple(timestep.shape), tuple(encoder_hidden_states.shape), extra)
+        with self._lock:
+            if key in self._graphs:
+                self._graphs.move_to_end(key)
+            else:
+                self._graphs[key] = self._capture(sample, timestep, encoder_hidden_states, kwargs)
+                while len(self._graphs) > _MAX_CUDA_GRAPHS:
+                    self._graphs.popitem(last=False)
+            entry = self._graphs[key]
+            if entry is not None:
+                graph, static_in, static_out, output_cls = entry
+                for dst, src in zip(static_in, (sample, timestep, encoder_hidden_states)):
+                    dst.copy_(src)
+                graph.replay()
+                out = static_out.clone()
+        if entry is None:
+            return self._forward(sample, timestep, encoder_hidden_states, return_dict=return_dict, **kwargs)
+        return output_cls(sample=out) if return_dict else (out,)
+
+    def _capture(self, sample, timestep, encoder_hidden_states, kwargs):
+        try:
+            static_in = (sample.clone(), timestep.clone(), encoder_hidden_states.clone())
+            side = torch.cuda.Stream()
+            side.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side):
+                # The first warm-up call also records the model's own output
+                # class (UNet2D/3DConditionOutput) for return_dict callers.
+                output_cls = type(self._forward(*static_in, return_dict=True, **kwargs))
+                self._forward(*static_in, return_dict=False, **kwargs)
+            torch.cuda.current_stream().wait_stream(side)
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_out = self._forward(*static_in, return_dict=False, **kwargs)[0]
+            return graph, static_in, static_out, output_cls
+        except Exception as e:  # pragma: no cover - depends on the model
+            logger.info("CUDA graph capture unavailable for UNet shape %s: %s", tuple(sample.shape), e)
+            return None
+
+
+def _enable_memory_savers(pipe) -> None:
+    """Decode the VAE in slices/tiles and use fused attention where supported.
+
+    Same FLOPs, much lower peak VRAM for the many-frame VAE decode, which lets
+    longer clips fit on the GPU.
+    """
+    for name in ("enable_vae_slicing", "enable_vae_tiling"):
+        try:  # pragma: no cover - depends on pipeline class
+            getattr(pipe, name)()
+        except Exception:
+            pass
+    try:  # pragma: no cover - depends on installed diffusers
+        from diffusers.models.attention_processor import AttnProcessor2_0
+        for module in (getattr(pipe, "unet", None), getattr(pipe, "vae", None)):
+            if module is not None and hasattr(module, "set_attn_processor"):
+                module.set_attn_processor(AttnProcessor2_0())
+        return
+    except Exception:
+        pass
+    try:  # pragma: no cover - torch < 2.0: fall back to xformers if present
+        pipe.enable_xformers_memory_efficient_attention()
     except Exception:
         pass
 
-    _PIPELINE_CACHE[cache_key] = pipe
-    return pipe, device
 
+def _range_scale_bias(lo: float, hi: float) -> tuple[float, float]:
+    """Scale and bias mapping float frames with values in [lo, hi] onto [0, 255]."""
+    if hi <= 1.0 and lo >= 0.0:
+        return 255.0, 0.0  # Range [0, 1]
+    if hi <= 1.0 and lo >= -1.0:
+        return 127.5, 127.5  # Range [-1, 1]
+    return 1.0, 0.0  # Assume [0, 255] range but float type
 
-def _ensure_pil_image(frame) -> Image.Image:
+
+def _tensor_to_numpy(t) -> np.ndarray:
+    """Copy a tensor to host memory, casting float data to uint8 on its device first.
+
+    Scaling before the transfer moves 1 byte per value over the bus instead of
+    2-4, and leaves no host-side float pass to do.
+    """
+    t = t.detach()
+    if t.is_floating_point():
+        scale, bias = _range_scale_bias(float(t.min()), float(t.max()))
+        t = t.mul(scale).add_(bias).clamp_(0, 255).to(torch.uint8)
+    return t.contiguous().cpu().numpy()
+
+
+@functools.lru_cache(maxsize=4)
+def _fp16_lut(scale: float, bias: float) -> np.ndarray:
+    """uint8 result of ``clip(x * scale + bias)`` for every one of the 65536 float16 bit patterns."""
+    values = np.arange(65536, dtype=np.uint16).view(np.float16).astype(np.float32)
+    with np.errstate(invalid="ignore", over="ignore"):
+        values = np.nan_to_num(values * scale + bias, nan=0.0, posinf=255.0, neginf=0.0)
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def _u8_converter(sample):
+    """Build a float -> uint8 converter whose scale/bias is chosen once.
+
+    The value range is probed on a strided sample of ``sample`` (typically the
+    whole frame batch) instead of a full min/max per frame; the result is
+    always clipped, so a sample that misses an outlier cannot wrap around.
+    The returned callable reuses one float32 scratch buffer per thread, and
+    maps float16 frames through a lookup table instead.
+    """
+    flat = np.asarray(sample).reshape(-1)
+    probe = flat[:: max(1, flat.size // 65536)]
+    lo, hi = (float(probe.min()), float(probe.max())) if probe.size else (0.0, 1.0)
+    scale, bias = _range_scale_bias(lo, hi)
+    scratch = threading.local()  # per-thread float32 buffer; frames may convert concurrently
+
+    def convert(arr: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return ``arr`` as uint8, written into ``out`` when one is given."""
+        if arr.dtype == np.float16:
+            # fp16 has only 65536 values: a table gather replaces the arithmetic.
+            lut = _fp16_lut(scale, bias)
+            if out is None:
+                return lut[arr.view(np.uint16)]
+            np.take(lut, arr.view(np.uint16), out=out)
+            return out
+        if _norm_to_u8 is not None and arr.ndim == 3:
+            dst = np.empty(arr.shape, dtype=np.uint8) if out is None else out
+            _norm_to_u8(arr, dst, scale, bias)
+            return dst
+        buf = getattr(scratch, "buf", None)
+        if buf is None or buf.shape != arr.shape:
+            buf = scratch.buf = np.empty(arr.shape, dtype=np.float32)
+        np.multiply(arr, scale, out=buf, dtype=np.float32)
+        if bias:
+            np.add(buf, bias, out=buf)
+        np.clip(buf, 0, 255, out=buf)
+        if out is None:
+            return buf.astype(np.uint8)
+        np.copyto(out, buf, casting="unsafe")
+        return out
+
+    return convert
+
+
+def _ensure_pil_image(frame, to_u8=None) -> Image.Image:
     """Convert various frame formats to PIL Image.
     
     Handles:
@@ -132,23 +444,35 @@ def _ensure_pil_image(frame) -> Image.Image:
     - Different channel orderings (CHW vs HWC)
     - Different value ranges (0-1 float vs 0-255 uint8)
     - Extra batch/time dimensions
+
+    ``to_u8`` is an optional converter from ``_u8_converter`` shared across a
+    batch so float frames are normalised without per-frame range checks.
     """
     if isinstance(frame, Image.Image):
         return frame
     
     try:
-        # Convert torch tensors to numpy
-        if hasattr(frame, 'cpu'):
-            frame = frame.cpu()
-        if hasattr(frame, 'numpy'):
-            frame = frame.numpy()
+        # Convert torch tensors to numpy (as uint8 when they hold floats)
+        if torch is not None and isinstance(frame, torch.Tensor):
+            frame = _tensor_to_numpy(frame)
+        else:
+            if hasattr(frame, 'cpu'):
+                frame = frame.cpu()
+            if hasattr(frame, 'numpy'):
+                frame = frame.numpy()
         
         arr = np.asarray(frame)
         original_shape = arr.shape
         
         # Remove all singleton dimensions (batch=1, time=1, etc.)
         arr = np.squeeze(arr)
-        
+
+        # Extra batch/time dims, e.g. (B, H, W, C), (B, C, H, W), (B, T, H, W, C):
+        # take the first frame with one index. Whole clips are split by
+        # generate_local_video before they get here.
+        if arr.ndim > 3:
+            arr = arr[(0,) * (arr.ndim - 3)]
+
         # Handle different dimensionalities
         if arr.ndim == 2:
             # Grayscale image (H, W) - convert to RGB
@@ -174,19 +498,6 @@ def _ensure_pil_image(frame) -> Image.Image:
             elif arr.shape[2] != 3:
                 raise ValueError(f"Unexpected number of channels: {arr.shape[2]}")
         
-        elif arr.ndim == 4:
-            # Might be (B, H, W, C) or (B, C, H, W) or (T, H, W, C)
-            # Take first frame/batch
-            arr = arr[0]
-            # Recursively process (now it's 3D)
-            return _ensure_pil_image(arr)
-        
-        elif arr.ndim > 4:
-            # Too many dimensions - keep squeezing and taking first element
-            while arr.ndim > 3:
-                arr = arr[0] if arr.shape[0] > 1 else np.squeeze(arr, axis=0)
-            return _ensure_pil_image(arr)
-        
         else:
             raise ValueError(f"Unexpected array dimensionality: {arr.ndim}")
         
@@ -195,18 +506,8 @@ def _ensure_pil_image(frame) -> Image.Image:
             # Already in correct format
             pass
         elif arr.dtype in [np.float32, np.float64, np.float16]:
-            # Float array - check range and normalize
-            arr_min, arr_max = arr.min(), arr.max()
-            
-            if arr_max <= 1.0 and arr_min >= 0.0:
-                # Range [0, 1] - scale to [0, 255]
-                arr = (arr * 255).astype(np.uint8)
-            elif arr_max <= 1.0 and arr_min >= -1.0:
-                # Range [-1, 1] - scale to [0, 255]
-                arr = ((arr + 1.0) * 127.5).astype(np.uint8)
-            else:
-                # Assume [0, 255] range but float type - just clip and convert
-                arr = np.clip(arr, 0, 255).astype(np.uint8)
+            # Float array - one fused scale/bias/clip pass
+            arr = (to_u8 or _u8_converter(arr))(arr)
         else:
             # Other integer types - clip to valid range and convert
             arr = np.clip(arr, 0, 255).astype(np.uint8)
@@ -215,9 +516,13 @@ def _ensure_pil_image(frame) -> Image.Image:
         if arr.ndim != 3 or arr.shape[2] != 3:
             raise ValueError(f"Failed to convert to (H, W, 3) format. Got shape: {arr.shape}")
         
-        # Create PIL Image
-        img = Image.fromarray(arr, mode='RGB')
-        return img
+        # Create PIL Image. Contiguous uint8 HWC data is handed to the raw
+        # decoder directly, skipping fromarray's array-interface handling and
+        # the extra contiguity copy; Pillow still unpacks RGB into its own
+        # 4-byte pixel layout, so that one copy remains.
+        if arr.flags.c_contiguous:
+            return Image.frombuffer('RGB', (arr.shape[1], arr.shape[0]), arr, 'raw', 'RGB', 0, 1)
+        return Image.fromarray(arr, mode='RGB')
         
     except Exception as exc:
         # Provide detailed error information for debugging
@@ -234,6 +539,73 @@ def _ensure_pil_image(frame) -> Image.Image:
         ) from exc
 
 
+def _channels_last(clip: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Return a 4D clip as one contiguous (T, H, W, C) block.
+
+    The channel axis is the one of size 1/3/4 that is not a spatial axis. A
+    single bulk transpose here replaces a strided CHW -> HWC copy per frame.
+    """
+    if clip.shape[-1] in (1, 3, 4):
+        return np.ascontiguousarray(clip)
+    spatial = {height, width}
+    for axis in (1, 0):
+        size = clip.shape[axis]
+        if size in (1, 3, 4) and size not in spatial and size < min(clip.shape[2:]):
+            return np.ascontiguousarray(np.moveaxis(clip, axis, -1))
+    return clip
+
+
+# Idle torch.Generator objects per device. Creating one on CUDA touches the
+# driver while reseeding is cheap; each call borrows its own so concurrent
+# jobs never reseed a generator another job is drawing from.
+_GENERATOR_POOL: Dict[str, List] = {}
+_GENERATOR_LOCK = threading.Lock()
+
+
+def _borrow_generator(device, seed: int):
+    with _GENERATOR_LOCK:
+        idle = _GENERATOR_POOL.setdefault(str(device), [])
+        gen = idle.pop() if idle else None
+    if gen is None:
+        gen = torch.Generator(device=device)
+    return gen.manual_seed(seed)
+
+
+def _return_generator(device, gen) -> None:
+    with _GENERATOR_LOCK:
+        _GENERATOR_POOL.setdefault(str(device), []).append(gen)
+
+
+def _uint8_batch(frames_list: list, to_u8) -> Optional[np.ndarray]:
+    """Pack same-shape (H, W, 3) array frames into one uint8 batch, or None."""
+    first = frames_list[0]
+    if not isinstance(first, np.ndarray) or first.ndim != 3 or first.shape[2] != 3:
+        return None
+    if any(not isinstance(f, np.ndarray) or f.shape != first.shape or f.dtype != first.dtype for f in frames_list):
+        return None
+    if first.dtype != np.uint8 and to_u8 is None:
+        return None
+    out = np.empty((len(frames_list), *first.shape), dtype=np.uint8)
+    if first.dtype == np.uint8:
+        for t, frame in enumerate(frames_list):
+            out[t] = frame
+        return out
+
+    # The Numba kernel, the fp16 table gather and the NumPy ufuncs all release
+    # the GIL, so frames convert in parallel on a small thread pool.
+    def fill(t: int) -> None:
+        to_u8(frames_list[t], out=out[t])
+
+    workers = min(8, os.cpu_count() or 1, len(frames_list))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(fill, range(len(frames_list))))
+    else:
+        for t in range(len(frames_list)):
+            fill(t)
+    return out
+
+
 def generate_local_video(
     *,
     model_key: str,
@@ -246,9 +618,12 @@ def generate_local_video(
     num_inference_steps: int,
     guidance_scale: float,
     seed: Optional[int],
-) -> List[Image.Image]:
+) -> "List[Image.Image] | np.ndarray":
     """Generate video frames with a local text-to-video model.
 
+    Returns a ``(T, H, W, 3)`` uint8 array when the pipeline produced regular
+    RGB frames, otherwise a list of PIL images.
+
     This function is intentionally conservative:
     - It clamps size/frames to reasonable ranges.
     - It handles minor API differences between pipelines by retrying with
@@ -268,7 +643,7 @@ def generate_local_video(
     generator = None
     if seed is not None and torch is not None:
         try:
-            generator = torch.Generator(device=device).manual_seed(int(seed))
+            generator = _borrow_generator(device, int(seed))
         except Exception:
             generator = None
 
@@ -292,11 +667,36 @@ def generate_local_video(
             kwargs["num_frames"] = int(num_frames)
         return pipe(**kwargs)
 
+    # Adjacent denoising steps barely change the UNet's deep features, so
+    # DeepCache recomputes them only every `deepcache_interval` steps. It
+    # monkey-patches the shared cached pipeline's UNet and keeps per-run step
+    # state, so concurrent jobs on one pipeline take turns for the whole
+    # enable / call / disable span.
+    use_deepcache = DeepCacheSDHelper is not None and settings.deepcache_interval > 1 and not settings.cuda_graphs
+    run_lock = _PIPELINE_LOCKS.setdefault(id(pipe), threading.Lock()) if use_deepcache else contextlib.nullcontext()
     try:
-        result = _call_with_optional_frames(add_frames=True)
-    except TypeError:
-        logger.info("Pipeline for '%s' does not accept 'num_frames' argument; retrying without it.", model_key)
-        result = _call_with_optional_frames(add_frames=False)
+        with run_lock:
+            helper = None
+            if use_deepcache:
+                try:
+                    helper = DeepCacheSDHelper(pipe=pipe)
+                    helper.set_params(cache_interval=settings.deepcache_interval, cache_branch_id=0)
+                    helper.enable()
+                except Exception as e:  # pragma: no cover - UNet layout not supported
+                    logger.info("DeepCache unavailable for '%s': %s", model_key, e)
+                    helper = None
+            try:
+                try:
+                    result = _call_with_optional_frames(add_frames=True)
+                except TypeError:
+                    logger.info("Pipeline for '%s' does not accept 'num_frames' argument; retrying without it.", model_key)
+                    result = _call_with_optional_frames(add_frames=False)
+            finally:
+                if helper is not None:
+                    helper.disable()
+    finally:
+        if generator is not None:
+            _return_generator(device, generator)
 
     # === CRITICAL FIX: Extract frames from pipeline output ===
     
@@ -317,11 +717,23 @@ def generate_local_video(
     if raw_frames is None:
         raise RuntimeError("Local pipeline did not return frames; got unsupported output type.")
 
-    # Convert to numpy for easier manipulation
-    if hasattr(raw_frames, 'cpu'):
-        raw_frames = raw_frames.cpu()
-    if hasattr(raw_frames, 'numpy'):
-        raw_frames = raw_frames.numpy()
+    # output_type="pil" pipelines already return images, either flat or one
+    # list per prompt; hand the first batch back without any array round-trip.
+    if isinstance(raw_frames, (list, tuple)) and raw_frames:
+        first_batch = raw_frames[0] if isinstance(raw_frames[0], (list, tuple)) else raw_frames
+        if first_batch and all(isinstance(f, Image.Image) for f in first_batch):
+            logger.info(f"Pipeline returned {len(first_batch)} PIL frames")
+            return list(first_batch)
+
+    # Convert to numpy for easier manipulation; float tensors are cast to
+    # uint8 on the device before the copy to host.
+    if torch is not None and isinstance(raw_frames, torch.Tensor):
+        raw_frames = _tensor_to_numpy(raw_frames)
+    else:
+        if hasattr(raw_frames, 'cpu'):
+            raw_frames = raw_frames.cpu()
+        if hasattr(raw_frames, 'numpy'):
+            raw_frames = raw_frames.numpy()
     
     frames_array = np.asarray(raw_frames)
     logger.info(f"Raw frames shape: {frames_array.shape}, dtype: {frames_array.dtype}")
@@ -331,11 +743,12 @@ def generate_local_video(
     frames_list = []
     
     if frames_array.ndim == 5:
-        # Shape: (batch, time, height, width, channels)
+        # Shape: (batch, time, height, width, channels), or channels-first
+        # variants such as (batch, C, T, H, W) / (batch, T, C, H, W).
         # Example: (1, 50, 576, 1024, 3)
-        logger.info(f"5D tensor detected: extracting {frames_array.shape[1]} frames from time dimension")
-        batch_frames = frames_array[0]  # Take first batch → (time, H, W, C)
-        frames_list = [batch_frames[t] for t in range(batch_frames.shape[0])]
+        batch_frames = _channels_last(frames_array[0], height, width)  # → (time, H, W, C)
+        logger.info(f"5D tensor detected: extracting {batch_frames.shape[0]} frames from time dimension")
+        frames_list = list(batch_frames)
         
     elif frames_array.ndim == 4:
         # Could be (time, H, W, C) or (batch, C, H, W)
@@ -373,11 +786,22 @@ def generate_local_video(
         if hasattr(first, 'shape'):
             logger.info(f"First frame shape: {first.shape}, dtype: {first.dtype}")
     
-    # Now convert each frame to PIL Image
+    # Choose the float range once per batch
+    to_u8 = _u8_converter(frames_array) if np.issubdtype(frames_array.dtype, np.floating) else None
+
+    # Common case: equally shaped HWC RGB frames. Fill one uint8 (T, H, W, 3)
+    # batch and hand that back as is; the generator muxes uint8 arrays from
+    # memory, so wrapping each frame in a PIL image would only add a copy.
+    batch = _uint8_batch(frames_list, to_u8)
+    if batch is not None:
+        logger.info(f"Converted {len(batch)} frames into a {batch.shape} uint8 batch")
+        return batch
+
+    # Otherwise convert each frame to a PIL Image
     pil_frames = []
     for i, frame in enumerate(frames_list):
         try:
-            pil_frame = _ensure_pil_image(frame)
+            pil_frame = _ensure_pil_image(frame, to_u8)
             pil_frames.append(pil_frame)
         except Exception as e:
             logger.error(f"Failed to convert frame {i}/{len(frames_list)}: {e}")
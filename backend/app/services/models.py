@@ -1,14 +1,217 @@
+import importlib.util
 import logging
 import os
 import time
 import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MODELS_DIR = Path.cwd() / "video-gen-models"
 
+# snapshot_download tuning: diffusers repos are many independent shards, so
+# fetch them in parallel, and skip the flax/onnx/msgpack duplicates some repos ship.
+_DOWNLOAD_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+# Configs, tokenizers, scheduler files and the modules of trust_remote_code
+# repos, needed whatever the weight format.
+_CONFIG_PATTERNS = ["*.json", "*.txt", "*.model", "*.yaml", "*.py"]
+# Most repos ship every submodule as both .safetensors and .bin; fetch only the
+# non-pickled formats, and the pickled weights only for repos that have neither.
+_PRIMARY_WEIGHT_SUFFIXES = (".safetensors", ".gguf")
+_WEIGHT_SUFFIXES = _PRIMARY_WEIGHT_SUFFIXES + (".bin", ".pt", ".pth", ".ckpt")
+_DOWNLOAD_PATTERNS = ["*.safetensors", "*.gguf", *_CONFIG_PATTERNS]
+_LEGACY_WEIGHT_PATTERNS = ["*.bin", "*.pt", "*.pth", "*.ckpt", *_CONFIG_PATTERNS]
+
+# The Rust hf_transfer backend splits large shards into parallel range requests,
+# which saturates links the pure-Python downloader can't. huggingface_hub reads
+# the flag when it is first imported (lazily, below), and errors out if the flag
+# is set without the package, so only opt in when it is actually installed.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+
+def _dir_stats(path: Path) -> Tuple[int, int]:
+    """``(total bytes, file count)`` for the files under ``path``.
+
+    Iterative ``os.scandir`` walk reading sizes from ``DirEntry.stat``, rather
+    than ``os.walk`` plus a separate ``os.path.getsize`` stat per file.
+    """
+    total = count = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                            count += 1
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return total, count
+
+
+def _dir_size(path: Path) -> int:
+    """Total size of the files under ``path``."""
+    return _dir_stats(path)[0]
+
+
+def _describe_download_error(e: Exception, repo_id: str, target_dir: Path) -> str:
+    """User-facing explanation for a failed download, chosen by exception type and HTTP status."""
+    import httpx
+    import requests
+    from huggingface_hub.utils import GatedRepoError, RepositoryNotFoundError
+
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if isinstance(e, PermissionError):
+        return f"Permission denied. Cannot write to {target_dir}. Please check directory permissions."
+    if isinstance(e, GatedRepoError) or status in (401, 403):
+        return "Authentication failed. Please check your Hugging Face token."
+    if isinstance(e, RepositoryNotFoundError) or status == 404:
+        return f"Model repository '{repo_id}' not found. Please check the repository ID."
+    if isinstance(e, (ConnectionError, TimeoutError, requests.exceptions.ConnectionError,
+                      requests.exceptions.Timeout, httpx.TransportError)):
+        return "Network connection error. Please check your internet connection."
+    return str(e)
+
+
+def _has_primary_weights(path: Path) -> bool:
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(_PRIMARY_WEIGHT_SUFFIXES):
+                        return True
+        except OSError:
+            pass
+    return False
+
+
+def _expected_files(repo_id: str, token: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """``{filename: size}`` that ``_snapshot_download`` will fetch, from the repo's API metadata.
+
+    None when the metadata is unavailable (offline, old hub release, ...).
+    """
+    try:
+        from huggingface_hub import HfApi
+        from huggingface_hub.utils import filter_repo_objects
+
+        siblings = HfApi().model_info(repo_id, files_metadata=True, token=token).siblings or []
+        sizes = {f.rfilename: f.size or 0 for f in siblings}
+        selected = list(filter_repo_objects(sizes, allow_patterns=_DOWNLOAD_PATTERNS))
+        if not any(name.endswith(_PRIMARY_WEIGHT_SUFFIXES) for name in selected):
+            selected = list(filter_repo_objects(sizes, allow_patterns=_LEGACY_WEIGHT_PATTERNS))
+        return {name: sizes[name] for name in selected}
+    except Exception as e:
+        logger.info(f"No file metadata for {repo_id}: {e}")
+        return None
+
+
+def _stat_expected(target_dir: Path, expected: Dict[str, int]) -> Tuple[int, List[str]]:
+    """``(bytes on disk, missing names)`` for the ``_expected_files`` listing.
+
+    A file shorter than its listed size counts as missing.
+    """
+    total, missing = 0, []
+    for name, size in expected.items():
+        try:
+            st_size = os.stat(target_dir / name).st_size
+        except OSError:
+            missing.append(name)
+            continue
+        if st_size < size:
+            missing.append(name)
+        total += st_size
+    return total, missing
+
+
+def _snapshot_download(repo_id: str, target_dir: Path, **kwargs) -> None:
+    """``snapshot_download`` into ``target_dir``, preferring safetensors/GGUF weights.
+
+    The legacy pass re-lists the repo but skips the configs already on disk.
+    """
+    from huggingface_hub import snapshot_download
+
+    kwargs.update(repo_id=repo_id, local_dir=str(target_dir), max_workers=_DOWNLOAD_WORKERS, etag_timeout=30)
+    snapshot_download(allow_patterns=_DOWNLOAD_PATTERNS, **kwargs)
+    if not _has_primary_weights(target_dir):
+        logger.info(f"{repo_id} has no safetensors/GGUF weights, fetching .bin/.pt/.ckpt files")
+        snapshot_download(allow_patterns=_LEGACY_WEIGHT_PATTERNS, **kwargs)
+
+
+# Finished/failed progress entries kept for late pollers before the oldest are pruned.
+_MAX_PROGRESS_ENTRIES = 256
+
+# How often the reporter publishes the aggregated tqdm counters to download_progress.
+_PROGRESS_INTERVAL = 0.5
+
+
+class _DownloadCounter:
+    """Byte and file counters fed by the progress bars ``snapshot_download`` opens.
+
+    The download worker threads bump the counters under ``lock``; a single
+    reporter thread reads them on a timer, so status polling never touches disk.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.bars: list = []
+
+    def tqdm_class(self):
+        """A silent ``tqdm`` subclass that records into this counter."""
+        from tqdm.auto import tqdm
+
+        counter = self
+
+        class _CountingTqdm(tqdm):
+            def __init__(self, *args, **kwargs):
+                kwargs.pop("name", None)
+                kwargs["disable"] = True
+                self.is_bytes = kwargs.get("unit") == "B"
+                super().__init__(*args, **kwargs)
+                with counter.lock:
+                    counter.bars.append(self)
+
+            def update(self, n=1):
+                with counter.lock:
+                    self.n += n or 0
+
+            def set_postfix_str(self, s="", refresh=True):
+                pass
+
+        return _CountingTqdm
+
+    def snapshot(self) -> Tuple[int, int, int, int]:
+        """``(bytes_done, bytes_total, files_done, files_total)``.
+
+        Newer huggingface_hub releases open aggregate byte bars alongside the
+        per-file bar; older ones only the latter, leaving the byte totals at 0.
+        """
+        bytes_done = bytes_total = files_done = files_total = 0
+        with self.lock:
+            for bar in self.bars:
+                if bar.is_bytes:
+                    bytes_done = max(bytes_done, int(bar.n))
+                    bytes_total = max(bytes_total, int(bar.total or 0))
+                else:
+                    files_done += int(bar.n)
+                    files_total += int(bar.total or 0)
+        return bytes_done, bytes_total, files_done, files_total
+
+
+class DownloadBusyError(RuntimeError):
+    """Raised when the maximum number of concurrent downloads is running."""
+
 
 class LocalModelRegistry:
     """
@@ -19,7 +222,14 @@ class LocalModelRegistry:
         self.base_dir = Path(base_dir) if base_dir else DEFAULT_MODELS_DIR
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.download_progress: dict[str, dict[str, Any]] = {}
+        # repo_id -> most recent download_id, so by-repo lookups skip the scan.
+        self._latest_by_repo: dict[str, str] = {}
         self._progress_lock = threading.Lock()
+        # Simultaneous multi-GB snapshots thrash disk and network; cap them.
+        self._download_slots = threading.BoundedSemaphore(max(1, settings.max_inflight_downloads))
+        # repo_id -> (tree signature, size_bytes, downloaded) from the last full walk.
+        self._info_cache: Dict[str, Tuple[frozenset, int, bool]] = {}
+        self._info_lock = threading.Lock()
 
     def _model_dir(self, repo_id: str) -> Path:
         safe = repo_id.replace("/", "__")
@@ -29,46 +239,85 @@ class LocalModelRegistry:
         """
         Check if model is downloaded by looking for any files in the model directory.
         More lenient check - just needs to have some files.
+        Stops at the first non-hidden file instead of listing the whole tree.
         """
-        model_dir = self._model_dir(repo_id)
-        if not model_dir.exists():
-            return False
-        # Check if directory has any files (not just empty)
+        stack = [str(self._model_dir(repo_id))]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif not entry.name.startswith('.') and entry.is_file():
+                            return True
+            except OSError:
+                pass
+        return False
+
+    @staticmethod
+    def _tree_signature(model_dir: Path) -> Optional[frozenset]:
+        """Directory mtimes plus ``(size, mtime)`` of every weight file under the tree.
+
+        Adding, removing or renaming a file anywhere bumps its directory's
+        mtime, and weights rewritten in place change their own stat. Only the
+        sizes of small config files edited in place go unnoticed, which is
+        far below what ``size_bytes`` is read for.
+        """
+        sig = set()
+        stack = [str(model_dir)]
         try:
-            files = list(model_dir.rglob("*"))
-            # Filter out directories and hidden files
-            files = [f for f in files if f.is_file() and not f.name.startswith('.')]
-            return len(files) > 0
-        except Exception:
-            return False
+            sig.add(("", os.stat(model_dir).st_mtime_ns))
+            while stack:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            sig.add((entry.path, entry.stat(follow_symlinks=False).st_mtime_ns))
+                        elif entry.name.endswith(_WEIGHT_SUFFIXES):
+                            st = entry.stat(follow_symlinks=False)
+                            sig.add((entry.path, st.st_size, st.st_mtime_ns))
+            return frozenset(sig)
+        except OSError:
+            return None
 
     def model_info(self, repo_id: str) -> Dict[str, Any]:
         model_dir = self._model_dir(repo_id)
-        size_bytes = 0
-        if model_dir.exists():
-            for root, _, files in os.walk(model_dir):
-                for f in files:
-                    try:
-                        size_bytes += os.path.getsize(os.path.join(root, f))
-                    except Exception:
-                        pass
+        sig = self._tree_signature(model_dir)
+        with self._info_lock:
+            cached = self._info_cache.get(repo_id)
+        if sig is not None and cached is not None and cached[0] == sig:
+            size_bytes, downloaded = cached[1], cached[2]
+        else:
+            size_bytes = _dir_size(model_dir)
+            downloaded = self.is_downloaded(repo_id)
+            if sig is not None:
+                with self._info_lock:
+                    self._info_cache[repo_id] = (sig, size_bytes, downloaded)
         return {
             "repo_id": repo_id,
-            "downloaded": self.is_downloaded(repo_id),
+            "downloaded": downloaded,
             "path": str(model_dir),
             "size_bytes": size_bytes,
         }
 
+    def _invalidate_info(self, repo_id: str) -> None:
+        """Drop the cached size; a download can rewrite files without touching any dir mtime."""
+        with self._info_lock:
+            self._info_cache.pop(repo_id, None)
+
     def start_download(self, repo_id: str, token: Optional[str] = None) -> str:
         """
         Start model download in background thread and return download_id.
-        Uses file system monitoring for progress tracking.
+        Progress comes from the tqdm bars snapshot_download reports through.
         """
         # Sanitize repo_id for use in download_id (remove slashes)
         safe_repo_id = repo_id.replace("/", "__").replace("\\", "__")
         download_id = f"{safe_repo_id}_{int(time.time() * 1000)}"
         target_dir = self._model_dir(repo_id)
-        
+
+        if not self._download_slots.acquire(blocking=False):
+            raise DownloadBusyError("Too many downloads in progress")
+
         logger.info(f"Starting download: repo_id={repo_id}, download_id={download_id}")
         
         with self._progress_lock:
@@ -80,201 +329,160 @@ class LocalModelRegistry:
                 "downloaded": 0,
                 "total": 0
             }
+            self._latest_by_repo[repo_id] = download_id
+            self._prune_progress()
         
         def download_thread():
             try:
-                from huggingface_hub import snapshot_download
-                import os
-                
                 # Ensure target directory exists
                 target_dir.mkdir(parents=True, exist_ok=True)
                 
-                # Get initial size if directory exists
-                initial_size = 0
-                if target_dir.exists():
-                    for root, _, files in os.walk(target_dir):
-                        for f in files:
-                            try:
-                                initial_size += os.path.getsize(os.path.join(root, f))
-                            except Exception:
-                                pass
-                
-                with self._progress_lock:
-                    self.download_progress[download_id].update({
-                        "progress": 5,
-                        "message": "Connecting to Hugging Face..."
-                    })
-                
+                # Known up front from the repo metadata, so neither progress nor
+                # the completion summary needs to walk the target directory.
+                expected = _expected_files(repo_id, token if token else None)
+                expected_total = sum(expected.values()) if expected else 0
+                self._update_progress(
+                    download_id,
+                    progress=10,
+                    total=expected_total,
+                    message=f"Downloading {repo_id}...",
+                )
+
                 logger.info(f"Starting download of {repo_id} to {target_dir}")
-                
-                # Start download in a separate process-like approach
-                # We'll monitor file system changes for progress
-                def update_progress():
-                    """Monitor download progress by checking file sizes"""
-                    last_size = initial_size
-                    check_count = 0
-                    while True:
-                        time.sleep(2)  # Check every 2 seconds
-                        check_count += 1
-                        
-                        with self._progress_lock:
-                            current_status = self.download_progress.get(download_id)
-                            if not current_status or current_status.get("status") != "downloading":
-                                break
-                        
-                        # Calculate current size
-                        current_size = initial_size
-                        file_count = 0
-                        try:
-                            if target_dir.exists():
-                                for root, _, files in os.walk(target_dir):
-                                    for f in files:
-                                        try:
-                                            current_size += os.path.getsize(os.path.join(root, f))
-                                            file_count += 1
-                                        except Exception:
-                                            pass
-                        except Exception:
-                            pass
-                        
-                        # Estimate progress (we don't know total, so use heuristic)
-                        if current_size > last_size:
-                            # Progress based on time and file growth
-                            # Assume download takes 5-10 minutes for large models
-                            estimated_progress = min(95, 10 + (check_count * 2))
-                            
-                            with self._progress_lock:
-                                if download_id in self.download_progress:
-                                    self.download_progress[download_id].update({
-                                        "progress": estimated_progress,
-                                        "downloaded": current_size,
-                                        "message": f"Downloading... {file_count} files, {current_size / (1024*1024):.1f} MB"
-                                    })
-                            last_size = current_size
-                
-                # Start progress monitor
-                progress_thread = threading.Thread(target=update_progress, daemon=True)
-                progress_thread.start()
-                
-                # Update progress before download
-                with self._progress_lock:
-                    if download_id in self.download_progress:
-                        self.download_progress[download_id].update({
-                            "progress": 10,
-                            "message": f"Downloading {repo_id}..."
-                        })
-                
+
+                def report_progress():
+                    """Publish the tqdm counters every _PROGRESS_INTERVAL until the download ends."""
+                    while not reporter_done.wait(_PROGRESS_INTERVAL):
+                        bytes_done, bytes_total, files_done, files_total = counter.snapshot()
+                        if bytes_total:
+                            fraction = bytes_done / bytes_total
+                        elif files_total:
+                            fraction = files_done / files_total
+                        else:
+                            continue
+                        self._update_progress(
+                            download_id,
+                            progress=min(95, 10 + int(85 * fraction)),
+                            downloaded=bytes_done,
+                            total=bytes_total or expected_total,
+                            message=f"Downloading... {files_done}/{files_total} files, {bytes_done / (1024*1024):.1f} MB",
+                        )
+
+                counter = _DownloadCounter()
+                reporter_done = threading.Event()
+                reporter = threading.Thread(target=report_progress, daemon=True)
+                reporter.start()
+
                 # Download with token if provided
                 try:
-                    snapshot_download(
-                        repo_id=repo_id,
-                        local_dir=str(target_dir),
-                        local_dir_use_symlinks=False,
+                    _snapshot_download(
+                        repo_id,
+                        target_dir,
                         token=token if token else None,
-                        resume_download=True,
-                        # Skip only markdown and git metadata; keep .txt files such as tokenizer merges.
-                        ignore_patterns=["*.md", "*.git*"]
+                        tqdm_class=counter.tqdm_class(),
                     )
                 except Exception as download_error:
                     logger.error(f"snapshot_download failed for {repo_id}: {download_error}")
                     raise
+                finally:
+                    reporter_done.set()
+                    self._invalidate_info(repo_id)
                 
                 logger.info(f"Download completed for {repo_id}, verifying files...")
-                
-                # Wait a moment for file system to sync
-                time.sleep(1)
-                
-                # Verify download completed
-                final_size = 0
-                final_file_count = 0
-                if target_dir.exists():
-                    for root, _, files in os.walk(target_dir):
-                        for f in files:
-                            try:
-                                file_path = os.path.join(root, f)
-                                if os.path.exists(file_path):
-                                    final_size += os.path.getsize(file_path)
-                                    final_file_count += 1
-                            except Exception as e:
-                                logger.warning(f"Error checking file {f}: {e}")
-                                pass
-                
+
+                # One stat per listed file confirms it landed, without walking the tree.
+                if expected:
+                    final_size, missing = _stat_expected(target_dir, expected)
+                    if missing:
+                        raise RuntimeError(
+                            f"Download incomplete: {len(missing)} of {len(expected)} files missing "
+                            f"in {target_dir} (e.g. {missing[0]})"
+                        )
+                    final_file_count = len(expected)
+                else:
+                    final_size, final_file_count = _dir_stats(target_dir)
+
                 if final_file_count == 0:
                     raise RuntimeError(f"Download completed but no files found in {target_dir}")
                 
                 logger.info(f"Verified: {final_file_count} files, {final_size / (1024*1024):.1f} MB")
                 
                 # Mark as complete
-                with self._progress_lock:
-                    if download_id in self.download_progress:
-                        self.download_progress[download_id].update({
-                            "status": "completed",
-                            "progress": 100,
-                            "message": f"Download completed ({final_file_count} files, {final_size / (1024*1024):.1f} MB)",
-                            "downloaded": final_size,
-                            "total": final_size
-                        })
+                self._update_progress(
+                    download_id,
+                    status="completed",
+                    progress=100,
+                    message=f"Download completed ({final_file_count} files, {final_size / (1024*1024):.1f} MB)",
+                    downloaded=final_size,
+                    total=final_size,
+                )
                     
             except Exception as e:
                 error_msg = str(e)
-                import traceback
-                full_traceback = traceback.format_exc()
-                logger.error(f"Failed to download model {repo_id}: {error_msg}\n{full_traceback}")
-                
-                # Extract more detailed error information
-                error_details = error_msg
-                if "401" in error_msg or "Unauthorized" in error_msg:
-                    error_details = "Authentication failed. Please check your Hugging Face token."
-                elif "404" in error_msg or "Not Found" in error_msg:
-                    error_details = f"Model repository '{repo_id}' not found. Please check the repository ID."
-                elif "Connection" in error_msg or "timeout" in error_msg.lower():
-                    error_details = "Network connection error. Please check your internet connection."
-                elif "Permission" in error_msg or "permission" in error_msg.lower():
-                    error_details = f"Permission denied. Cannot write to {target_dir}. Please check directory permissions."
-                
-                with self._progress_lock:
-                    if download_id in self.download_progress:
-                        self.download_progress[download_id].update({
-                            "status": "failed",
-                            "progress": 0,
-                            "message": f"Download failed: {error_details}",
-                            "error": error_details,
-                            "error_details": error_msg
-                        })
+                logger.error(f"Failed to download model {repo_id}: {error_msg}")
+                logger.debug(f"Download traceback for {repo_id}", exc_info=True)
+                error_details = _describe_download_error(e, repo_id, target_dir)
+
+                self._update_progress(
+                    download_id,
+                    status="failed",
+                    progress=0,
+                    message=f"Download failed: {error_details}",
+                    error=error_details,
+                    error_details=error_msg,
+                )
+            finally:
+                self._download_slots.release()
         
         # Use non-daemon thread to ensure it completes
         thread = threading.Thread(target=download_thread, daemon=False, name=f"Download-{repo_id}")
-        thread.start()
+        try:
+            thread.start()
+        except Exception:
+            self._download_slots.release()
+            raise
         return download_id
     
+    def _update_progress(self, download_id: str, **fields) -> None:
+        """Publish a new progress entry instead of mutating the one readers may hold.
+
+        Writers serialise on _progress_lock; readers take no lock, since each
+        entry they get back is an immutable snapshot and dict get/set is atomic.
+        """
+        with self._progress_lock:
+            current = self.download_progress.get(download_id)
+            if current is not None:
+                self.download_progress[download_id] = {**current, **fields}
+
     def get_download_progress(self, download_id: str) -> Optional[Dict[str, Any]]:
         """Get download progress by download_id."""
-        with self._progress_lock:
-            progress = self.download_progress.get(download_id)
-            if progress is None:
-                # Try to find by repo_id if download_id not found (for backwards compatibility)
-                logger.warning(f"Download ID not found: {download_id}. Available IDs: {list(self.download_progress.keys())[:5]}")
-            return progress
+        progress = self.download_progress.get(download_id)
+        if progress is None:
+            # Try to find by repo_id if download_id not found (for backwards compatibility)
+            logger.warning(f"Download ID not found: {download_id}. Available IDs: {list(self.download_progress)[:5]}")
+        return progress
     
     def get_download_progress_by_repo(self, repo_id: str) -> Optional[Dict[str, Any]]:
-        """Get download progress by repo_id (finds most recent download for this repo)."""
-        with self._progress_lock:
-            # Find most recent download for this repo
-            matching = []
-            for did, prog in self.download_progress.items():
-                if prog.get("repo_id") == repo_id:
-                    matching.append((did, prog))
-            if matching:
-                # Return the most recent one (highest download_id timestamp)
-                matching.sort(key=lambda x: x[0], reverse=True)
-                logger.info(f"Found progress by repo_id {repo_id}: {matching[0][0]}")
-                return matching[0][1]
-            return None
-    
+        """Get download progress by repo_id (the most recent download for this repo)."""
+        download_id = self._latest_by_repo.get(repo_id)
+        return self.download_progress.get(download_id) if download_id else None
+
+    def _prune_progress(self) -> None:
+        """Drop the oldest finished entries beyond _MAX_PROGRESS_ENTRIES. Caller holds _progress_lock."""
+        excess = len(self.download_progress) - _MAX_PROGRESS_ENTRIES
+        if excess <= 0:
+            return
+        # Dicts keep insertion order, so the first finished entries are the oldest.
+        stale = [did for did, prog in self.download_progress.items()
+                 if prog.get("status") in ("completed", "failed")][:excess]
+        for did in stale:
+            repo_id = self.download_progress.pop(did).get("repo_id")
+            if self._latest_by_repo.get(repo_id) == did:
+                del self._latest_by_repo[repo_id]
+
     def list_active_downloads(self) -> Dict[str, Dict[str, Any]]:
         """List all active downloads (for debugging)."""
-        with self._progress_lock:
-            return dict(self.download_progress)
+        return dict(self.download_progress)
     
     def ensure_downloaded(self, repo_id: str, token: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -284,15 +492,8 @@ class LocalModelRegistry:
         if self.is_downloaded(repo_id):
             return self.model_info(repo_id)
         try:
-            from huggingface_hub import snapshot_download
-            target_dir = self._model_dir(repo_id)
-            snapshot_download(
-                repo_id=repo_id,
-                local_dir=str(target_dir),
-                local_dir_use_symlinks=False,
-                token=token,
-                resume_download=True
-            )
+            _snapshot_download(repo_id, self._model_dir(repo_id), token=token)
+            self._invalidate_info(repo_id)
             return self.model_info(repo_id)
         except Exception as e:
             logger.error(f"Failed to download model {repo_id}: {e}")
@@ -1,9 +1,24 @@
-import multiprocessing
+import functools
+import math
+import os
 import platform
 import subprocess
+import threading
+import time
 import json as _json
 
+try:  # Optional: physical core count
+    import psutil
+except Exception:  # pragma: no cover - psutil not installed
+    psutil = None
 
+# GPUs rarely change under a running process; re-probe nvidia-smi at most this often.
+_HW_TTL = 30.0
+_hw_cache: tuple[float, dict] | None = None
+_hw_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
 def _torch_info():
     try:
         import torch
@@ -74,18 +89,76 @@ def _nvidia_smi_info():
     return None
 
 
+def _usable_cpus() -> int:
+    """CPUs this process may actually run on: affinity mask, capped by a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _cpu_model() -> str:
+    """``platform.processor()`` is empty on most Linux distros; ask the OS directly."""
+    system = platform.system()
+    try:
+        if system == "Linux":
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    if line.startswith("model name"):
+                        return line.split(":", 1)[1].strip()
+        elif system == "Darwin":
+            result = subprocess.run(['sysctl', '-n', 'machdep.cpu.brand_string'],
+                                    capture_output=True, text=True, timeout=3)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+    except Exception:
+        pass
+    return platform.processor()
+
+
+@functools.lru_cache(maxsize=1)
+def _cpu_info():
+    cpus = _usable_cpus()
+    physical = psutil.cpu_count(logical=False) if psutil is not None else None
+    return {
+        "cores": cpus,
+        "threads": cpus,
+        "physical_cores": min(physical, cpus) if physical else None,
+        "model": _cpu_model(),
+    }
+
+
 def get_hardware_info():
+    """Hardware summary, cached for ``_HW_TTL`` seconds (torch's view for the process lifetime)."""
+    global _hw_cache
+    cached = _hw_cache
+    if cached is not None and time.monotonic() - cached[0] < _HW_TTL:
+        return cached[1]
+    with _hw_lock:
+        cached = _hw_cache
+        if cached is not None and time.monotonic() - cached[0] < _HW_TTL:
+            return cached[1]
+        info = _probe_hardware()
+        _hw_cache = (time.monotonic(), info)
+        return info
+
+
+def _probe_hardware():
     gpu = _torch_info()
     if not gpu.get('cuda_available'):
         alt = _nvidia_smi_info()
         if alt:
             gpu = alt
     return {
-        "cpu": {
-            "cores": multiprocessing.cpu_count(),
-            "threads": multiprocessing.cpu_count(),
-            "model": platform.processor(),
-        },
+        "cpu": _cpu_info(),
         "gpu": gpu,
     }
 
@@ -0,0 +1,17 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Keep generated frames/videos out of the repository's ./videos during tests.
+# Set before any test module imports backend.app.main, which builds storage.
+_STORAGE_DIR = tempfile.mkdtemp(prefix="ttg-test-videos-")
+os.environ["TTG_STORAGE_BASE_PATH"] = _STORAGE_DIR
+
+
+def pytest_unconfigure(config):
+    # Write pending metadata now rather than from atexit, after the dir is gone.
+    storage = sys.modules.get("backend.app.services.storage")
+    if storage is not None and storage._storage is not None:
+        storage._storage.flush()
+    shutil.rmtree(_STORAGE_DIR, ignore_errors=True)
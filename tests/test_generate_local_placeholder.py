@@ -41,3 +41,39 @@ def test_generate_local_placeholder_completes():
     raise AssertionError("Generation did not complete in time")
 
 
+
+
+def test_generate_rejects_when_all_slots_busy():
+    from backend.app.main import generator
+
+    held = 0
+    while generator._job_slots.acquire(blocking=False):
+        held += 1
+    try:
+        r = client.post("/generate", json={"prompt": "A lighthouse in fog", "use_hf_api": False})
+        assert r.status_code == 503
+    finally:
+        for _ in range(held):
+            generator._job_slots.release()
+
+
+def test_generate_missing_local_model_fails_cleanly(tmp_path, monkeypatch):
+    from backend.app.main import generator
+    from backend.app.services.models import LocalModelRegistry
+
+    monkeypatch.setattr(generator, "_model_registry", LocalModelRegistry(str(tmp_path)))
+    r = client.post("/generate", json={
+        "prompt": "A lighthouse in fog",
+        "use_hf_api": False,
+        "local_model_key": "zeroscope-local",
+    })
+    assert r.status_code == 200
+    job_id = r.json()["job_id"]
+    for _ in range(30):
+        status = client.get(f"/status/{job_id}").json()
+        if status.get("status") == "failed":
+            assert "not downloaded" in status["error"]
+            assert not generator._registry_warm
+            return
+        time.sleep(0.1)
+    raise AssertionError("Generation did not fail in time")
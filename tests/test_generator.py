@@ -0,0 +1,168 @@
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append('.')
+from backend.app.services import generator as generator_module  # noqa: E402
+from backend.app.services.generator import VideoGenerator  # noqa: E402
+
+
+def test_postprocess_kernel_matches_numpy_reference():
+    if generator_module._postprocess_frame is None:
+        pytest.skip("numba not installed")
+    rng = np.random.default_rng(0)
+    flowed = (rng.random((16, 24, 3)) * 300 - 20).astype(np.float32)
+    noise = rng.standard_normal(size=flowed.shape, dtype=np.float32)
+    exposure, g_scale, b_scale, sigma = 1.02, 0.99, 1.01, 0.75
+
+    out = np.empty(flowed.shape, dtype=np.uint8)
+    generator_module._postprocess_frame(flowed, out, exposure, g_scale, b_scale, noise, sigma)
+
+    ref = np.clip(flowed * exposure, 0, 255)
+    ref[..., 1] *= g_scale
+    ref[..., 2] *= b_scale
+    ref = np.clip(ref + noise * sigma, 0, 255).astype(np.uint8)
+    assert np.abs(out.astype(int) - ref.astype(int)).max() <= 1
+
+
+def test_motion_frames_shape_and_dtype():
+    gen = VideoGenerator.__new__(VideoGenerator)
+    base = Image.new('RGB', (64, 48), color=(40, 80, 120))
+    frames = gen._create_motion_from_base(base, 3)
+    assert frames.shape == (3, 48, 64, 3)
+    assert frames.dtype == np.uint8 and frames.flags.c_contiguous
+
+
+def test_save_frames_pipelines_a_frame_generator(tmp_path):
+    from backend.app.services.storage import VideoStorage
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "p", "fps": 8})
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.video_storage = store
+    base = Image.new('RGB', (64, 48), color=(40, 80, 120))
+
+    saved = gen._save_frames(meta["id"], gen._iter_motion_frames(base, 12))
+
+    video_dir = tmp_path / meta["id"]
+    assert saved == 12
+    # Encoded in one pass; only frame 0 is kept as a PNG for the thumbnail.
+    assert [f.name for f in video_dir.glob("frame_*.png")] == ["frame_0000.png"]
+    assert (video_dir / "thumbnail.jpg").exists()
+    cap = cv2.VideoCapture(str(video_dir / "output.mp4"))
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    assert count == 12
+
+
+def test_save_frames_fails_when_mux_fails(tmp_path, monkeypatch):
+    from backend.app.services.storage import VideoStorage
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "p", "fps": 8})
+    monkeypatch.setattr(store, "_write_mp4", lambda *a, **k: False)
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.video_storage = store
+    frames = [np.full((16, 16, 3), i * 40, dtype=np.uint8) for i in range(4)]
+
+    # Muxed frames are not kept around for a retry.
+    with pytest.raises(RuntimeError):
+        gen._save_frames(meta["id"], frames)
+
+
+def test_save_frames_stitches_unmuxable_frames_from_disk(tmp_path):
+    from backend.app.services.storage import VideoStorage
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "p", "fps": 8})
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.video_storage = store
+    frames = [np.full((16, 16), i * 40, dtype=np.uint8) for i in range(4)]  # grayscale: not muxable
+
+    assert gen._save_frames(meta["id"], frames) == 4
+    video_dir = tmp_path / meta["id"]
+    assert len(list(video_dir.glob("frame_*.png"))) == 4
+    assert (video_dir / "output.mp4").exists()
+
+
+def test_status_updates_replace_the_snapshot():
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.generation_status = {}
+    gen._status_locks = (threading.Lock(),)
+    gen._update_generation_status("job", status="pending", progress=0)
+    before = gen.get_generation_status("job")
+    gen._update_generation_status("job", progress=50)
+    assert before == {"status": "pending", "progress": 0}
+    assert gen.get_generation_status("job") == {"status": "pending", "progress": 50}
+
+
+def test_save_frames_writes_rgb_pngs(tmp_path):
+    from backend.app.services.storage import VideoStorage
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "p", "fps": 8})
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.video_storage = store
+    frame = np.zeros((16, 16, 3), dtype=np.uint8)
+    frame[..., 0] = 200  # pure red
+
+    assert gen._save_frames(meta["id"], [frame]) == 1
+    png = np.array(Image.open(tmp_path / meta["id"] / "frame_0000.png"))
+    assert png[0, 0].tolist() == [200, 0, 0]
+
+
+def test_save_frames_writes_pil_frames(tmp_path):
+    from backend.app.services.storage import VideoStorage
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "p", "fps": 8})
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen.video_storage = store
+    frames = [Image.new('RGB', (16, 16), (0, 0, 180)), Image.new('P', (16, 16))]
+
+    assert gen._save_frames(meta["id"], frames) == 2
+    png = np.array(Image.open(tmp_path / meta["id"] / "frame_0000.png"))
+    assert png[0, 0].tolist() == [0, 0, 180]
+
+
+def test_motion_frames_numpy_fallback(monkeypatch):
+    monkeypatch.setattr(generator_module, "_postprocess_frame", None)
+    gen = VideoGenerator.__new__(VideoGenerator)
+    base = Image.new('RGB', (64, 48), color=(40, 80, 120))
+    frames = gen._create_motion_from_base(base, 3)
+    assert frames.shape == (3, 48, 64, 3) and frames.dtype == np.uint8
+    assert abs(frames.mean() - 80) < 3
+
+
+def test_motion_frames_without_flow_use_plain_warp(monkeypatch):
+    monkeypatch.setattr(generator_module, "_FLOW_EPS", 10.0)
+    gen = VideoGenerator.__new__(VideoGenerator)
+    base = Image.new('RGB', (64, 48), color=(40, 80, 120))
+    frames = gen._create_motion_from_base(base, 3)
+    assert frames.shape == (3, 48, 64, 3)
+    assert abs(frames.mean() - 80) < 3
+
+
+def test_hf_payload_caps_steps_per_model():
+    class _Resp:
+        status_code = 200
+        headers = {"content-type": "video/mp4"}
+
+    class _Session:
+        def post(self, url, json, **kwargs):
+            self.payload = json
+            return _Resp()
+
+    gen = VideoGenerator.__new__(VideoGenerator)
+    gen._http = _Session()
+    gen._generate_with_hf_api("p", 4, 256, 256, "hf_x", None, 50, 7.5, None,
+                              model_repo="cerspense/zeroscope_v2_576w")
+    assert gen._http.payload["parameters"]["num_inference_steps"] == 25
+    gen._generate_with_hf_api("p", 4, 256, 256, "hf_x", None, 40, 7.5, None, model_repo="some/other-model")
+    assert gen._http.payload["parameters"]["num_inference_steps"] == 40
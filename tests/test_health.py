@@ -19,3 +19,11 @@ def test_hardware():
     assert r.status_code == 200
     data = r.json()
     assert 'cpu' in data
+
+
+def test_supported_models():
+    r = client.get('/models/supported')
+    assert r.status_code == 200
+    models = r.json()['models']
+    assert 'damo-vilab/text-to-video-ms-1.7b' in models
+    assert len(models) == len(set(models))
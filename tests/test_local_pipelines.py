@@ -0,0 +1,194 @@
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from backend.app.services.local_pipelines import _ensure_pil_image, _u8_converter  # noqa: E402
+
+
+@pytest.mark.parametrize("lo,hi", [(0.0, 1.0), (-1.0, 1.0), (0.0, 255.0)])
+def test_float_frames_scale_to_uint8(lo, hi):
+    rng = np.random.default_rng(0)
+    batch = (rng.random((2, 8, 8, 3)) * (hi - lo) + lo).astype(np.float32)
+    batch[0, 0, 0] = (lo, hi, (lo + hi) / 2)
+    to_u8 = _u8_converter(batch)
+    img = np.asarray(_ensure_pil_image(batch[0], to_u8))
+    assert img.dtype == np.uint8 and img.shape == (8, 8, 3)
+    assert img[0, 0, 0] == 0 and img[0, 0, 1] == 255
+
+
+def test_chw_frame_is_transposed():
+    frame = np.zeros((3, 16, 24), dtype=np.uint8)
+    frame[0] = 200
+    img = np.asarray(_ensure_pil_image(frame))
+    assert img.shape == (16, 24, 3)
+    assert img[0, 0].tolist() == [200, 0, 0]
+
+
+def test_fp16_lut_matches_arithmetic():
+    rng = np.random.default_rng(1)
+    batch = (rng.random((8, 8, 3)) * 2 - 1).astype(np.float16)
+    lut_out = _u8_converter(batch)(batch)
+    ref = _u8_converter(batch.astype(np.float32))(batch.astype(np.float32))
+    assert lut_out.dtype == np.uint8
+    assert np.array_equal(lut_out, ref)
+
+
+def test_channels_last_moves_channel_axis_once():
+    from backend.app.services.local_pipelines import _channels_last
+
+    clip = np.zeros((3, 5, 16, 24), dtype=np.float32)  # (C, T, H, W)
+    clip[0] = 1.0
+    out = _channels_last(clip, 16, 24)
+    assert out.shape == (5, 16, 24, 3) and out.flags.c_contiguous
+    assert out[2, 0, 0].tolist() == [1.0, 0.0, 0.0]
+    assert _channels_last(np.zeros((5, 3, 16, 24)), 16, 24).shape == (5, 16, 24, 3)
+
+
+def test_norm_kernel_matches_numpy(monkeypatch):
+    from backend.app.services import local_pipelines
+
+    if local_pipelines._norm_to_u8 is None:
+        pytest.skip("numba not installed")
+    rng = np.random.default_rng(2)
+    frame = (rng.random((8, 8, 3)) * 2.2 - 1.1).astype(np.float32)
+    fused = _u8_converter(frame)(frame)
+    monkeypatch.setattr(local_pipelines, "_norm_to_u8", None)
+    ref = _u8_converter(frame)(frame)
+    assert np.abs(fused.astype(int) - ref.astype(int)).max() <= 1
+
+
+def test_uint8_batch_packs_float_frames():
+    from backend.app.services.local_pipelines import _uint8_batch
+
+    clip = np.linspace(0, 1, 4 * 6 * 8 * 3, dtype=np.float32).reshape(4, 6, 8, 3)
+    batch = _uint8_batch(list(clip), _u8_converter(clip))
+    assert batch.shape == (4, 6, 8, 3) and batch.dtype == np.uint8
+    assert batch[0, 0, 0, 0] == 0 and batch[-1, -1, -1, -1] == 255
+    assert _uint8_batch([np.zeros((6, 8), np.uint8)], None) is None
+
+
+def test_leading_dims_take_first_frame():
+    clip = np.zeros((2, 4, 3, 8, 8), dtype=np.uint8)  # (B, T, C, H, W)
+    clip[0, 0, 1] = 90
+    img = np.asarray(_ensure_pil_image(clip))
+    assert img.shape == (8, 8, 3)
+    assert img[0, 0].tolist() == [0, 90, 0]
+
+
+class _FakeTensor:
+    def __init__(self, shape, device="cuda"):
+        self.shape, self.dtype, self.device = shape, "float16", device
+
+    def to(self, device):
+        return self
+
+    def clone(self):
+        return _FakeTensor(self.shape, self.device)
+
+
+def _fake_torch(monkeypatch, captures):
+    from types import SimpleNamespace
+    from backend.app.services import local_pipelines
+
+    def no_stream():
+        captures.append(1)
+        raise RuntimeError("no CUDA in tests")
+
+    fake = SimpleNamespace(
+        Tensor=_FakeTensor,
+        tensor=lambda value, device: _FakeTensor((), device),
+        cuda=SimpleNamespace(Stream=no_stream),
+    )
+    monkeypatch.setattr(local_pipelines, "torch", fake)
+    return local_pipelines
+
+
+def test_graphed_unet_runs_eagerly_when_capture_fails(monkeypatch):
+    captures = []
+    lp = _fake_torch(monkeypatch, captures)
+    calls = []
+
+    def forward(sample, timestep, encoder_hidden_states, return_dict=True, **kwargs):
+        calls.append(sample.shape)
+        return "eager"
+
+    unet = lp._GraphedUNet(forward)
+    sample, text = _FakeTensor((1, 4, 8, 8)), _FakeTensor((1, 77, 768))
+    assert unet(sample, 10, text) == "eager"
+    assert unet(sample, 9, text) == "eager"
+    # Captured once; the failure is remembered and later steps go straight to eager.
+    assert len(captures) == 1 and len(calls) == 2
+
+
+def test_graphed_unet_evicts_least_recent_shapes(monkeypatch):
+    captures = []
+    lp = _fake_torch(monkeypatch, captures)
+    monkeypatch.setattr(lp, "_MAX_CUDA_GRAPHS", 2)
+    unet = lp._GraphedUNet(lambda *a, **k: "eager")
+    text = _FakeTensor((1, 77, 768))
+    for size in (8, 16, 8, 32):
+        unet(_FakeTensor((1, 4, size, size)), 1, text)
+    assert [key[0] for key in unet._graphs] == [(1, 4, 8, 8), (1, 4, 32, 32)]
+    assert len(captures) == 3
+
+
+def test_deepcache_runs_on_a_shared_pipeline_do_not_overlap(monkeypatch):
+    import threading
+    import time
+    from pathlib import Path
+    from types import SimpleNamespace
+    from PIL import Image
+    from backend.app.services import local_pipelines as lp
+
+    active, overlaps = [], []
+
+    class FakeHelper:
+        def __init__(self, pipe):
+            pass
+
+        def set_params(self, **kwargs):
+            pass
+
+        def enable(self):
+            active.append(self)
+            if len(active) > 1:
+                overlaps.append(len(active))
+
+        def disable(self):
+            active.remove(self)
+
+    def pipe(**kwargs):
+        time.sleep(0.05)
+        return SimpleNamespace(frames=[[Image.new("RGB", (8, 8))] * 8])
+
+    monkeypatch.setattr(lp, "DeepCacheSDHelper", FakeHelper)
+    monkeypatch.setattr(lp.settings, "deepcache_interval", 3)
+    monkeypatch.setattr(lp.settings, "cuda_graphs", False)
+    monkeypatch.setattr(lp, "_get_pipeline", lambda key, repo_dir: (pipe, "cpu"))
+
+    def run():
+        lp.generate_local_video(model_key="m", repo_dir=Path("."), prompt="p", negative_prompt=None,
+                                num_frames=8, width=256, height=256, num_inference_steps=10,
+                                guidance_scale=7.5, seed=None)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == [] and active == []
+
+
+def test_weights_that_exceed_vram_skip_device_map(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    from backend.app.services import local_pipelines as lp
+
+    (tmp_path / "unet").mkdir()
+    (tmp_path / "unet" / "diffusion_pytorch_model.safetensors").write_bytes(b"\0" * 1000)
+    props = SimpleNamespace(total_memory=1000)
+    monkeypatch.setattr(lp, "torch", SimpleNamespace(cuda=SimpleNamespace(get_device_properties=lambda i: props)))
+    assert not lp._weights_fit_in_vram(tmp_path)
+    props.total_memory = 10_000
+    assert lp._weights_fit_in_vram(tmp_path)
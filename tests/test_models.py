@@ -0,0 +1,191 @@
+import sys
+
+sys.path.append('.')
+from backend.app.services.models import LocalModelRegistry  # noqa: E402
+
+
+def test_model_info_reflects_new_files(tmp_path):
+    registry = LocalModelRegistry(str(tmp_path))
+    repo = "org/model"
+    assert registry.model_info(repo)["downloaded"] is False
+
+    unet = registry._model_dir(repo) / "unet"
+    unet.mkdir(parents=True)
+    (unet / "weights.safetensors").write_bytes(b"x" * 10)
+    info = registry.model_info(repo)
+    assert info["downloaded"] is True and info["size_bytes"] == 10
+
+    # Cached: same answer without rewalking while the tree is unchanged.
+    assert registry.model_info(repo) == info
+    (unet / "config.json").write_bytes(b"{}")
+    assert registry.model_info(repo)["size_bytes"] == 12
+
+
+def test_model_info_sees_deep_and_in_place_weight_changes(tmp_path):
+    import os
+
+    registry = LocalModelRegistry(str(tmp_path))
+    repo = "org/model"
+    unet = registry._model_dir(repo) / "snapshots" / "abc" / "unet"
+    unet.mkdir(parents=True)
+    weights = unet / "diffusion_pytorch_model.safetensors"
+    weights.write_bytes(b"x" * 10)
+    assert registry.model_info(repo)["size_bytes"] == 10
+
+    (unet / "extra.safetensors").write_bytes(b"y" * 5)
+    assert registry.model_info(repo)["size_bytes"] == 15
+
+    # Rewritten in place with the directory mtime held fixed.
+    dir_times = os.stat(unet).st_atime_ns, os.stat(unet).st_mtime_ns
+    weights.write_bytes(b"x" * 20)
+    os.utime(unet, ns=dir_times)
+    assert registry.model_info(repo)["size_bytes"] == 25
+
+
+def test_dir_size_counts_nested_files(tmp_path):
+    from backend.app.services.models import _dir_size
+
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "top.bin").write_bytes(b"1234")
+    (tmp_path / "a" / "b" / "deep.bin").write_bytes(b"56")
+    assert _dir_size(tmp_path) == 6
+    assert _dir_size(tmp_path / "missing") == 0
+
+
+def test_dir_stats_counts_files(tmp_path):
+    from backend.app.services.models import _dir_stats
+
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.json").write_bytes(b"{}")
+    (tmp_path / "sub" / "b.bin").write_bytes(b"123")
+    assert _dir_stats(tmp_path) == (5, 2)
+
+
+def test_download_counter_aggregates_tqdm_bars():
+    from backend.app.services.models import _DownloadCounter
+
+    counter = _DownloadCounter()
+    bar_cls = counter.tqdm_class()
+    with bar_cls(total=3, desc="Fetching 3 files") as files:
+        files.update(1)
+        files.update(1)
+    size = bar_cls(total=0, initial=0, unit="B", unit_scale=True)
+    size.total = 100
+    size.update(40)
+    assert counter.snapshot() == (40, 100, 2, 3)
+
+
+def test_is_downloaded_ignores_hidden_files_and_empty_dirs(tmp_path):
+    registry = LocalModelRegistry(str(tmp_path))
+    repo = "org/model"
+    model_dir = registry._model_dir(repo)
+    (model_dir / "empty").mkdir(parents=True)
+    (model_dir / ".gitattributes").write_bytes(b"")
+    assert registry.is_downloaded(repo) is False
+    (model_dir / "empty" / "model_index.json").write_bytes(b"{}")
+    assert registry.is_downloaded(repo) is True
+
+
+def test_snapshot_download_falls_back_to_legacy_weights(tmp_path, monkeypatch):
+    import huggingface_hub
+    from backend.app.services import models
+
+    calls = []
+
+    def fake_snapshot_download(repo_id, local_dir, allow_patterns, **kwargs):
+        calls.append(allow_patterns)
+        if repo_id == "org/safe":
+            (tmp_path / "unet").mkdir(exist_ok=True)
+            (tmp_path / "unet" / "model.safetensors").write_bytes(b"")
+
+    monkeypatch.setattr(huggingface_hub, "snapshot_download", fake_snapshot_download)
+    models._snapshot_download("org/legacy", tmp_path)
+    assert calls == [models._DOWNLOAD_PATTERNS, models._LEGACY_WEIGHT_PATTERNS]
+    assert "*.bin" not in models._DOWNLOAD_PATTERNS
+
+    calls.clear()
+    models._snapshot_download("org/safe", tmp_path)
+    assert calls == [models._DOWNLOAD_PATTERNS]
+
+
+def test_download_progress_by_repo_and_pruning(tmp_path, monkeypatch):
+    from backend.app.services import models
+
+    monkeypatch.setattr(models, "_MAX_PROGRESS_ENTRIES", 2)
+    registry = LocalModelRegistry(str(tmp_path))
+    with registry._progress_lock:
+        for i, status in enumerate(["completed", "failed", "downloading"]):
+            did = f"d{i}"
+            registry.download_progress[did] = {"repo_id": f"org/m{i % 2}", "status": status}
+            registry._latest_by_repo[f"org/m{i % 2}"] = did
+        registry._prune_progress()
+    assert list(registry.download_progress) == ["d1", "d2"]
+    assert registry.get_download_progress_by_repo("org/m0")["status"] == "downloading"
+    assert registry.get_download_progress_by_repo("org/m1")["status"] == "failed"
+    assert registry.get_download_progress_by_repo("org/none") is None
+
+
+def test_update_progress_publishes_new_entry(tmp_path):
+    registry = LocalModelRegistry(str(tmp_path))
+    registry.download_progress["d"] = {"repo_id": "org/m", "status": "downloading", "progress": 0}
+    before = registry.get_download_progress("d")
+    registry._update_progress("d", progress=50)
+    assert before["progress"] == 0
+    assert registry.get_download_progress("d") == {"repo_id": "org/m", "status": "downloading", "progress": 50}
+    registry._update_progress("missing", progress=1)
+    assert "missing" not in registry.download_progress
+
+
+def test_describe_download_error_by_type(tmp_path):
+    import requests
+    from backend.app.services.models import _describe_download_error
+
+    class _Resp:
+        status_code = 401
+
+    http_error = requests.HTTPError("boom")
+    http_error.response = _Resp()
+    assert "Authentication" in _describe_download_error(http_error, "org/m", tmp_path)
+    assert "Permission" in _describe_download_error(PermissionError("x"), "org/m", tmp_path)
+    assert "Network" in _describe_download_error(requests.ConnectionError("x"), "org/m", tmp_path)
+    assert _describe_download_error(RuntimeError("odd"), "org/m", tmp_path) == "odd"
+
+
+def test_expected_files_follow_download_patterns(monkeypatch):
+    import huggingface_hub
+    from types import SimpleNamespace
+    from backend.app.services.models import _expected_files
+
+    def fake_api(files):
+        siblings = [SimpleNamespace(rfilename=name, size=size) for name, size in files.items()]
+        return lambda: SimpleNamespace(model_info=lambda repo_id, **kw: SimpleNamespace(siblings=siblings))
+
+    monkeypatch.setattr(huggingface_hub, "HfApi", fake_api(
+        {"README.md": 1, "unet/config.json": 2, "unet/model.safetensors": 30, "unet/model.bin": 30}))
+    assert _expected_files("org/m") == {"unet/config.json": 2, "unet/model.safetensors": 30}
+
+    monkeypatch.setattr(huggingface_hub, "HfApi", fake_api({"unet/config.json": 2, "unet/model.bin": 30}))
+    assert _expected_files("org/m") == {"unet/config.json": 2, "unet/model.bin": 30}
+
+
+def test_expected_files_keep_gguf_and_remote_code(monkeypatch):
+    import huggingface_hub
+    from types import SimpleNamespace
+    from backend.app.services.models import _expected_files
+
+    files = {"config.json": 2, "model-Q4_K_M.gguf": 40, "modeling_custom.py": 3, "README.md": 1}
+    siblings = [SimpleNamespace(rfilename=name, size=size) for name, size in files.items()]
+    monkeypatch.setattr(huggingface_hub, "HfApi",
+                        lambda: SimpleNamespace(model_info=lambda repo_id, **kw: SimpleNamespace(siblings=siblings)))
+    assert _expected_files("org/m-GGUF") == {"config.json": 2, "model-Q4_K_M.gguf": 40, "modeling_custom.py": 3}
+
+
+def test_stat_expected_reports_missing_and_short_files(tmp_path):
+    from backend.app.services import models
+
+    (tmp_path / "unet").mkdir()
+    (tmp_path / "unet" / "model.safetensors").write_bytes(b"x" * 8)
+    (tmp_path / "model_index.json").write_bytes(b"{}")
+    expected = {"unet/model.safetensors": 8, "model_index.json": 2, "vae/model.safetensors": 4}
+    assert models._stat_expected(tmp_path, expected) == (10, ["vae/model.safetensors"])
+    assert models._stat_expected(tmp_path, {"unet/model.safetensors": 16}) == (8, ["unet/model.safetensors"])
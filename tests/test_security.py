@@ -0,0 +1,66 @@
+import sys
+from fastapi.testclient import TestClient
+
+sys.path.append('.')
+from backend.app.main import app  # noqa: E402
+
+client = TestClient(app)
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_security_headers_present():
+    r = client.get('/health')
+    assert r.status_code == 200
+    assert r.headers['x-frame-options'] == 'DENY'
+    assert r.headers['x-content-type-options'] == 'nosniff'
+    assert r.headers['referrer-policy'] == 'strict-origin-when-cross-origin'
+
+
+def test_rate_limit_returns_429_when_exceeded():
+    from backend.app.core.security import RateLimitMiddleware
+
+    limited = TestClient(RateLimitMiddleware(ok_app, requests_per_minute=2))
+    assert limited.get('/').status_code == 200
+    assert limited.get('/').status_code == 200
+    r = limited.get('/')
+    assert r.status_code == 429
+    assert r.json()['detail'] == 'Rate limit exceeded'
+
+
+def test_rate_limit_sweep_drops_idle_clients():
+    from backend.app.core.security import RateLimitMiddleware
+
+    limiter = RateLimitMiddleware(ok_app, requests_per_minute=10)
+    TestClient(limiter).get('/')
+    assert limiter.sweep() == 0
+    limiter.window = 0.0
+    assert limiter.sweep() == 1
+    assert not any(limiter._maps)
+
+
+def test_rate_limit_falls_back_when_redis_unreachable():
+    import pytest
+    pytest.importorskip("redis.asyncio")
+    from backend.app.core.security import RateLimitMiddleware
+
+    limiter = RateLimitMiddleware(ok_app, requests_per_minute=1, redis_url="redis://127.0.0.1:1/0")
+    limited = TestClient(limiter)
+    assert limiter._redis_script is not None
+    assert limiter._redis_down_until == 0.0
+    assert limited.get('/').status_code == 200
+    assert limiter._redis_down_until > 0.0
+    assert limited.get('/').status_code == 429
+
+
+def test_rate_limit_bounds_tracked_clients():
+    from backend.app.core.security import RateLimitMiddleware
+
+    limiter = RateLimitMiddleware(None, requests_per_minute=10, max_clients=RateLimitMiddleware._shards)
+    for i in range(500):
+        limiter._local_hit(f"10.0.{i // 256}.{i % 256}")
+    assert sum(len(m) for m in limiter._maps) <= RateLimitMiddleware._shards
+    assert limiter.evictions > 0
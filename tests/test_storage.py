@@ -0,0 +1,149 @@
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from backend.app.services import storage as storage_module  # noqa: E402
+from backend.app.services.storage import VideoStorage  # noqa: E402
+
+
+def _frame_count(path) -> int:
+    import cv2
+    cap = cv2.VideoCapture(str(path))
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+@pytest.mark.parametrize("use_pyav", [True, False])
+def test_create_video_file_from_arrays(tmp_path, monkeypatch, use_pyav):
+    if use_pyav and storage_module.av is None:
+        pytest.skip("PyAV not installed")
+    if not use_pyav:
+        monkeypatch.setattr(storage_module, "av", None)
+    store = VideoStorage(str(tmp_path))
+    frames = [np.full((48, 64, 3), i * 20, dtype=np.uint8) for i in range(6)]
+    assert store._create_video_file(tmp_path, frames, fps=8)
+    assert _frame_count(tmp_path / "output.mp4") == 6
+
+    batch = np.stack(frames[:4])
+    assert store._create_video_file(tmp_path, batch, fps=8)
+    assert _frame_count(tmp_path / "output.mp4") == 4
+
+    # Odd sizes take the per-frame resize path (yuv420p needs even dimensions).
+    odd = np.zeros((3, 47, 63, 3), dtype=np.uint8)
+    assert store._create_video_file(tmp_path, odd, fps=8)
+    assert _frame_count(tmp_path / "output.mp4") == 3
+
+
+def test_save_video_stream_writes_chunks(tmp_path):
+    class _Resp:
+        def iter_content(self, chunk_size):
+            yield b"abc"
+            yield b""
+            yield b"def"
+
+    store = VideoStorage(str(tmp_path))
+    assert store.save_video_stream(tmp_path, _Resp())
+    assert (tmp_path / "output.mp4").read_bytes() == b"abcdef"
+
+
+def test_metadata_reloads_when_file_changes(tmp_path):
+    reader = VideoStorage(str(tmp_path))
+    assert reader.list_videos() == []
+    writer = VideoStorage(str(tmp_path))
+    meta = writer.create_video_entry({"prompt": "x"})
+    writer.flush()
+    assert reader.get_video(meta["id"]) == meta
+
+
+def test_save_metadata_is_compact_and_leaves_no_tmp(tmp_path):
+    import orjson
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "x"})
+    store.flush()
+    raw = (tmp_path / "metadata.json").read_bytes()
+    assert orjson.loads(raw) == {meta["id"]: meta}
+    assert b"\n" not in raw
+    assert not (tmp_path / "metadata.json.tmp").exists()
+
+
+def test_extract_frames_from_video_writes_every_step(tmp_path):
+    store = VideoStorage(str(tmp_path))
+    frames = [np.full((48, 64, 3), i * 20, dtype=np.uint8) for i in range(8)]
+    assert store._create_video_file(tmp_path, frames, fps=8)
+    assert store.extract_frames_from_video(tmp_path, fps=4) == 4
+    assert sorted(p.name for p in tmp_path.glob("frame_*.png")) == [f"frame_{i:04d}.png" for i in range(4)]
+    assert (tmp_path / "thumbnail.jpg").exists()
+
+
+def test_metadata_writes_are_coalesced(tmp_path, monkeypatch):
+    import time
+
+    monkeypatch.setattr(storage_module, "_FLUSH_DELAY", 0.05)
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "x"})
+    for i in range(1, 20):
+        store.update_video_frames(meta["id"], i)
+    # The background flusher writes the whole burst once the delay passes.
+    deadline = time.monotonic() + 5
+    while store._dirty.is_set() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    store.flush()
+    assert VideoStorage(str(tmp_path)).get_video(meta["id"])["frame_count"] == 19
+
+
+def test_create_thumbnail_from_in_memory_frame(tmp_path):
+    from PIL import Image
+
+    store = VideoStorage(str(tmp_path))
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[..., 2] = 255  # BGR red
+    assert store._create_thumbnail(tmp_path, frame)
+    assert not list(tmp_path.glob("frame_*.png"))
+    with Image.open(tmp_path / "thumbnail.jpg") as img:
+        assert img.size == (267, 200)
+        r, g, b = img.getpixel((10, 10))
+        assert r > 200 and g < 50 and b < 50
+
+
+def test_refresh_does_not_drop_unflushed_entries(tmp_path):
+    store = VideoStorage(str(tmp_path))
+    store.create_video_entry({"prompt": "a"})
+    store.flush()
+    # Another worker rewrites the file, then we add an entry before flushing.
+    other = VideoStorage(str(tmp_path))
+    other.create_video_entry({"prompt": "b"})
+    other.flush()
+    meta = store.create_video_entry({"prompt": "c"})
+    assert store.get_video(meta["id"]) == meta
+
+
+def test_readers_do_not_wait_on_metadata_fsync(tmp_path, monkeypatch):
+    import threading
+
+    store = VideoStorage(str(tmp_path))
+    meta = store.create_video_entry({"prompt": "x"})
+    in_fsync, release = threading.Event(), threading.Event()
+    real_fsync = storage_module.os.fsync
+
+    def slow_fsync(fd):
+        in_fsync.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(storage_module.os, "fsync", slow_fsync)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert in_fsync.wait(5)
+    try:
+        assert store._metadata_lock.acquire(timeout=1)
+        store._metadata_lock.release()
+        assert store.get_video(meta["id"]) == meta
+    finally:
+        release.set()
+        flusher.join()
@@ -0,0 +1,74 @@
+import sys
+import time
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+sys.path.append('.')
+from backend.app.main import app, storage  # noqa: E402
+
+client = TestClient(app)
+
+
+def _generate_placeholder() -> str:
+    payload = {
+        "prompt": "A paper boat drifting down a rainy street",
+        "num_frames": 4,
+        "fps": 8,
+        "width": 128,
+        "height": 128,
+        "use_hf_api": False,
+    }
+    r = client.post("/generate", json=payload)
+    assert r.status_code == 200
+    job_id = r.json()["job_id"]
+    for _ in range(50):
+        status = client.get(f"/status/{job_id}").json()
+        if status.get("status") == "completed":
+            return status["video_id"]
+        if status.get("status") == "failed":
+            raise AssertionError(f"Generation failed: {status}")
+        time.sleep(0.1)
+    raise AssertionError("Generation did not complete in time")
+
+
+def test_video_listed_and_rebuilt_from_frames():
+    video_id = _generate_placeholder()
+    assert video_id in {v["id"] for v in client.get("/videos").json()}
+
+    video_dir = Path(storage.storage_base_path) / video_id
+    output = video_dir / "output.mp4"
+    output.unlink(missing_ok=True)
+    # Only frame_0000.png is kept after a muxed generation: too few to rebuild.
+    assert client.get(f"/videos/{video_id}/output.mp4").status_code == 404
+
+    first = (video_dir / "frame_0000.png").read_bytes()
+    for i in range(1, 4):
+        (video_dir / f"frame_{i:04d}.png").write_bytes(first)
+    r = client.get(f"/videos/{video_id}/output.mp4")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "video/mp4"
+    assert r.headers["content-disposition"] == f'attachment; filename="video_{video_id}.mp4"'
+    assert output.exists()
+
+
+def test_static_mount_only_exposes_artifacts():
+    video_id = _generate_placeholder()
+    assert client.get(f"/videos-static/{video_id}/output.mp4").status_code == 200
+    assert client.get("/videos-static/metadata.json").status_code == 404
+    assert client.get(f"/videos-static/{video_id}/frame_0000.png").status_code == 404
+
+
+def test_thumbnail_served():
+    video_id = _generate_placeholder()
+    r = client.get(f"/videos/{video_id}/thumbnail.jpg")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/jpeg"
+
+
+def test_unknown_ids_return_404():
+    r = client.get("/status/does-not-exist")
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Job not found"
+    r = client.get("/videos/does-not-exist")
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Video not found"